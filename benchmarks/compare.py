@@ -0,0 +1,83 @@
+"""Compare two results of benchmarks.run
+
+.. code-block:: bash
+
+    python -m benchmarks.compare base.json new.json --threshold 1.2
+
+The cases are matched by the problem and the target number of rows.
+The exit status is 1 when the time or the peak memory of a phase grows
+more than the threshold ratio.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(filename):
+    with open(filename) as f:
+        data = json.load(f)
+    return {
+        (result["problem"], result["target_rows"]): result for result in data["results"]
+    }
+
+
+def compare(base, new, threshold=1.2, min_time=0.01):
+    """
+    Parameters
+    ----------
+    base : dict
+        (problem, target rows) -> result
+    new : dict
+    threshold : float
+        ratio regarded as regression
+    min_time : float
+        phases faster than this seconds in both are not regarded as regression
+
+    Returns
+    -------
+    list of tuple
+        (problem, target rows, phase, metric, base value, new value, ratio, regressed)
+    """
+    rows = []
+    for key in sorted(base.keys() & new.keys()):
+        base_phases = base[key]["phases"]
+        new_phases = new[key]["phases"]
+        for phase in base_phases:
+            if phase not in new_phases:
+                continue
+            for metric in ["time", "peak_memory"]:
+                if metric not in base_phases[phase] or metric not in new_phases[phase]:
+                    continue
+                old_value = base_phases[phase][metric]
+                new_value = new_phases[phase][metric]
+                ratio = new_value / old_value if old_value > 0 else float("inf")
+                regressed = ratio > threshold
+                if metric == "time" and max(old_value, new_value) < min_time:
+                    regressed = False
+                rows.append(
+                    (*key, phase, metric, old_value, new_value, ratio, regressed)
+                )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-time", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.base), load(args.new), args.threshold, args.min_time)
+    for problem, target_rows, phase, metric, old, new, ratio, regressed in rows:
+        mark = "  <-- regression" if regressed else ""
+        print(
+            f"{problem:<16}{target_rows:>9} {phase:<22}{metric:<12}"
+            f"{old:>14.6g}{new:>14.6g}{ratio:>8.2f}{mark}"
+        )
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""Generators of the benchmark problems
+
+Each generator creates a problem from the number of units (bars, blocks,
+scenarios, items or chains), and the number of rows grows linearly with it.
+The data are drawn from numpy.random.default_rng(seed).
+"""
+
+import math
+
+import numpy as np
+
+from ppulp import *
+
+
+def transportation(n, seed=0, **kwargs):
+    """transportation problem of the tutorial with n bars
+
+    Each bar is connected to five warehouses, one of which can supply
+    all of the bars connected first to it, so the problem is feasible.
+    """
+    rng = np.random.default_rng(seed)
+    num_warehouses = max(2, n // 10)
+    demand = rng.integers(10, 100, size=n)
+    supply = np.zeros(num_warehouses, dtype=int)
+    np.add.at(supply, np.arange(n) % num_warehouses, demand)
+    supply = (supply * 1.2).astype(int) + 10
+
+    prob = LpProblem("Transportation", LpMinimize, **kwargs)
+    routes = {}
+    for b in range(n):
+        for k in range(min(5, num_warehouses)):
+            w = (b + k * 7) % num_warehouses
+            routes[w, b] = LpVariable(f"Route_{w}_{b}", 0, None, LpInteger)
+    costs = rng.integers(1, 10, size=len(routes)).tolist()
+    prob += lpSum(c * var for c, var in zip(costs, routes.values()))
+
+    outflows = [[] for _ in range(num_warehouses)]
+    inflows = [[] for _ in range(n)]
+    for (w, b), var in routes.items():
+        outflows[w].append(var)
+        inflows[b].append(var)
+    for w in range(num_warehouses):
+        prob += lpSum(outflows[w]) <= int(supply[w]), f"Supply_{w}"
+    for b in range(n):
+        prob += lpSum(inflows[b]) >= int(demand[b]), f"Demand_{b}"
+    return prob
+
+
+def sudoku(n, seed=0, **kwargs):
+    """n independent Sudoku-like assignment blocks of the tutorial
+
+    The clues are taken from a shuffled valid grid, so each block is feasible.
+    """
+    rng = np.random.default_rng(seed)
+    values = rows = cols = range(9)
+    boxes = [
+        [(3 * i + k, 3 * j + l) for k in range(3) for l in range(3)]
+        for i in range(3)
+        for j in range(3)
+    ]
+
+    prob = LpProblem("Sudoku", **kwargs)
+    for block in range(n):
+        choices = [
+            [
+                [LpVariable(f"Choice_{block}_{v}_{r}_{c}", cat="Binary") for c in cols]
+                for r in rows
+            ]
+            for v in values
+        ]
+        for r in rows:
+            for c in cols:
+                prob += lpSum(choices[v][r][c] for v in values) == 1
+        for v in values:
+            for r in rows:
+                prob += lpSum(choices[v][r][c] for c in cols) == 1
+            for c in cols:
+                prob += lpSum(choices[v][r][c] for r in rows) == 1
+            for box in boxes:
+                prob += lpSum(choices[v][r][c] for r, c in box) == 1
+
+        permutation = rng.permutation(9)
+        for r in rows:
+            for c in cols:
+                if rng.random() < 0.3:
+                    v = permutation[(3 * (r % 3) + r // 3 + c) % 9]
+                    prob += choices[v][r][c] == 1
+    return prob
+
+
+def two_stage(n, seed=0, num_products=10, **kwargs):
+    """two-stage production planning problem of the tutorial with n scenarios"""
+    rng = np.random.default_rng(seed)
+    steel = rng.uniform(0.5, 2.0, size=num_products)
+    molding = rng.uniform(0.5, 1.5, size=num_products)
+    assembly = rng.uniform(0.2, 0.6, size=num_products)
+    earnings = rng.integers(80, 200, size=(n, num_products))
+    capacity = rng.integers(5, 20, size=num_products)
+    cap_assembly = rng.integers(8, 12, size=n)
+    cap_molding = 10 * num_products
+    steel_price = 58
+
+    prob = LpProblem("Two_Stage_Production", LpMaximize, **kwargs)
+    production = [
+        [
+            LpVariable(f"production_{s}_{i}", lowBound=0, upBound=int(capacity[i]))
+            for i in range(num_products)
+        ]
+        for s in range(n)
+    ]
+    steel_purchase = LpVariable("steelpurchase", lowBound=0)
+    prob += (
+        lpSum(
+            float(earnings[s, i]) / n * production[s][i]
+            for s in range(n)
+            for i in range(num_products)
+        )
+        - steel_price * steel_purchase
+    )
+    for s in range(n):
+        prob += lpSum(steel[i] * production[s][i] for i in range(num_products)) <= (
+            steel_purchase
+        )
+        prob += (
+            lpSum(molding[i] * production[s][i] for i in range(num_products))
+            <= cap_molding
+        )
+        prob += lpSum(
+            assembly[i] * production[s][i] for i in range(num_products)
+        ) <= int(cap_assembly[s])
+    return prob
+
+
+def piecewise(n, seed=0, num_breakpoints=10, **kwargs):
+    """n items whose costs are PiecewiseLinear approximations
+
+    The items are divided into groups of ten, and each group has the demand
+    covered by its items with a convex, concave or nonconvex cost.
+    """
+    rng = np.random.default_rng(seed)
+    functions = [
+        PiecewiseLinear(np.square, 0, 10, num=num_breakpoints),
+        PiecewiseLinear(np.sqrt, 0, 10, num=num_breakpoints),
+        PiecewiseLinear(lambda x: 5 * np.sin(x) + x, 0, 10, num=num_breakpoints),
+    ]
+    x = [LpVariable(f"x_{i}", lowBound=0, upBound=10) for i in range(n)]
+    kinds = rng.integers(0, len(functions), size=(n + 9) // 10)
+
+    prob = LpProblem("Piecewise", LpMinimize, **kwargs)
+    prob += lpSum(functions[kinds[i // 10]](xi) for i, xi in enumerate(x))
+    for start in range(0, n, 10):
+        group = x[start : start + 10]
+        prob += lpSum(group) >= 3 * len(group)
+    return prob
+
+
+def logic(n, seed=0, depth=20, **kwargs):
+    """n chains of And, Or and Xor with the given depth"""
+    rng = np.random.default_rng(seed)
+    operators = [And, Or, Xor]
+
+    prob = LpProblem("Logic", LpMaximize, **kwargs)
+    ends = []
+    literals = []
+    for chain in range(n):
+        x = [LpVariable(f"x_{chain}_{d}", cat="Binary") for d in range(depth + 1)]
+        z = x[0]
+        for d in range(depth):
+            z = operators[int(rng.integers(0, 3))](z, x[d + 1])
+        ends.append(z)
+        literals += x
+        prob += lpSum(x) <= depth // 2
+    costs = rng.uniform(0, 0.1, size=len(literals)).tolist()
+    prob += lpSum(ends) - lpSum(c * xi for c, xi in zip(costs, literals))
+    return prob
+
+
+GENERATORS = {
+    "transportation": transportation,
+    "sudoku": sudoku,
+    "two_stage": two_stage,
+    "piecewise": piecewise,
+    "logic": logic,
+}
+
+
+def units_for_rows(generator, rows, probe=20):
+    """number of units of generator whose problem has about the given rows
+
+    Parameters
+    ----------
+    generator : function
+    rows : int
+        target number of rows after linearization
+    probe : int
+        number of units of the problem built to measure the rows per unit
+
+    Returns
+    -------
+    int
+    """
+    prob = generator(probe)
+    prob.linearize()
+    rows_per_unit = max(len(prob.constraints), 1) / probe
+    return max(1, math.ceil(rows / rows_per_unit))
@@ -0,0 +1,204 @@
+"""Run the benchmarks and save the results in JSON
+
+.. code-block:: bash
+
+    python -m benchmarks.run --rows 1000 10000 100000 --output results.json
+    python -m benchmarks.run --problems sudoku logic --rows 1000000 --solve-max-rows 0
+
+Each problem is built for the target number of rows, and the wall time and
+the peak memory traced by tracemalloc are measured for the phases
+"build", "linearize", "flopt_to_pulp", "writeLP" and "solve" separately.
+The phases in solve() are taken from LpProblem.stats as "solve.write"
+(the file written by pulp), "solve.solver" (the run of CBC),
+"solve.read_solution" and "solve.decode".
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from ppulp import LpStatus
+
+from benchmarks.generators import GENERATORS, units_for_rows
+
+SOLVE_PHASES = ["write", "solver", "read_solution", "decode"]
+
+
+@contextlib.contextmanager
+def measure(phases, name, memory=True):
+    """record the wall time and the peak memory of the block in phases[name]"""
+    if memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    yield
+    phases[name] = {"time": time.perf_counter() - start}
+    if memory:
+        phases[name]["peak_memory"] = tracemalloc.get_traced_memory()[1] - base
+
+
+def run_case(name, rows, solve=True, time_limit=60, memory=True, seed=0):
+    """build, convert, write and solve a problem
+
+    Parameters
+    ----------
+    name : str
+        name of generator in GENERATORS
+    rows : int
+        target number of rows
+    solve : bool
+    time_limit : float
+        time limit of CBC in seconds
+    memory : bool
+        if it is true, the peak memory is traced by tracemalloc
+    seed : int
+
+    Returns
+    -------
+    dict
+        result of the case
+    """
+    generator = GENERATORS[name]
+    units = units_for_rows(generator, rows)
+    phases = {}
+    with measure(phases, "build", memory):
+        prob = generator(units, seed=seed, stats=True)
+    with measure(phases, "linearize", memory):
+        prob.linearize()
+    with measure(phases, "flopt_to_pulp", memory):
+        prob.set_pulp()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with measure(phases, "writeLP", memory):
+            prob.writeLP(os.path.join(tmp_dir, "prob.lp"))
+
+    result = {
+        "problem": name,
+        "target_rows": rows,
+        "units": units,
+        "rows": prob.pulp_lp.numConstraints(),
+        "columns": len(prob.pulp_vars),
+        "phases": phases,
+        "status": None,
+    }
+    if solve:
+        prob.stats.reset()
+        with measure(phases, "solve", memory):
+            prob.solve(msg=False, timeLimit=time_limit)
+        stats = prob.stats.toDict()
+        for phase in SOLVE_PHASES:
+            if phase in stats:
+                phases[f"solve.{phase}"] = {"time": stats[phase]["time"]}
+        result["status"] = LpStatus[prob.status]
+    return result
+
+
+def merge_repeats(results):
+    """minimum time and maximum peak memory of the repeated runs of a case"""
+    merged = dict(results[0])
+    merged["phases"] = {}
+    for phase in results[0]["phases"]:
+        values = [result["phases"][phase] for result in results]
+        merged["phases"][phase] = {"time": min(value["time"] for value in values)}
+        if "peak_memory" in values[0]:
+            merged["phases"][phase]["peak_memory"] = max(
+                value["peak_memory"] for value in values
+            )
+    merged["repeat"] = len(results)
+    return merged
+
+
+def environment():
+    """versions and machine of the run"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        from importlib.metadata import version
+
+        ppulp_version = version("ppulp")
+    except Exception:
+        ppulp_version = None
+    return {
+        "ppulp": ppulp_version,
+        "commit": commit or None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--problems",
+        nargs="+",
+        default=list(GENERATORS),
+        choices=list(GENERATORS),
+    )
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument(
+        "--solve-max-rows",
+        type=int,
+        default=100000,
+        help="problems with more rows are not solved",
+    )
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="do not trace the peak memory"
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    memory = not args.no_memory
+    if memory:
+        tracemalloc.start()
+    results = []
+    for rows in args.rows:
+        for name in args.problems:
+            runs = [
+                run_case(
+                    name,
+                    rows,
+                    solve=rows <= args.solve_max_rows,
+                    time_limit=args.time_limit,
+                    memory=memory,
+                    seed=args.seed,
+                )
+                for _ in range(args.repeat)
+            ]
+            result = merge_repeats(runs)
+            results.append(result)
+            times = ", ".join(
+                f"{phase} {value['time']:.3f}s"
+                for phase, value in result["phases"].items()
+                if "." not in phase
+            )
+            print(f"{name:<16}{result['rows']:>9} rows  {times}", flush=True)
+
+    if memory:
+        tracemalloc.stop()
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"results are saved in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
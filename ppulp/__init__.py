@@ -28,6 +28,7 @@ from flopt import Prod as lpProd
 from pulp import LpStatus, makeDict, allcombinations
 
 from ppulp.problem import LpProblem
+from ppulp.parameter import LpParameter
 from ppulp.utils import (
     And,
     Or,
@@ -36,4 +37,18 @@ from ppulp.utils import (
     PiecewiseLinear,
     maxValue,
     minValue,
+    valueBounds,
+    IfThen,
 )
+from ppulp.utils import ImplicationRows
+from flopt.constraint import Constraint
+
+_flopt_rshift = Constraint.__rshift__
+
+
+def __rshift__(self, other):
+    # the rows of flopt are kept for flopt.Problem, LpProblem uses IfThen
+    return ImplicationRows(_flopt_rshift(self, other), self, other)
+
+
+Constraint.__rshift__ = __rshift__
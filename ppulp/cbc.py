@@ -0,0 +1,240 @@
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pulp
+
+from flopt.constants import np_float
+
+from ppulp.writer import write_mps
+
+cbc_status = {
+    "Optimal": pulp.LpStatusOptimal,
+    "Infeasible": pulp.LpStatusInfeasible,
+    "Integer": pulp.LpStatusInfeasible,
+    "Unbounded": pulp.LpStatusUnbounded,
+    "Stopped": pulp.LpStatusNotSolved,
+}
+
+
+class PULP_CBC_CMD(pulp.PULP_CBC_CMD):
+    """PULP_CBC_CMD which writes the initial solution from varValue of variables,
+    because value() of the pulp variables of LpProblem returns themselves.
+    The problem is passed in LP format when it has special ordered sets,
+    which are not written in MPS format by pulp.
+
+    Attributes
+    ----------
+    stats : None or Stats
+        if it is enabled, the file write, the run of CBC and the read of
+        the solution are recorded as "write", "solver" and "read_solution"
+    """
+
+    stats = None
+
+    def actualSolve(self, lp, **kwargs):
+        use_mps = not (lp.sos1 or lp.sos2)
+        if self.stats is None or not self.stats.enabled:
+            return self.solve_CBC(lp, use_mps=use_mps)
+
+        # solve_CBC() is measured by wrapping the writers and the reader it calls
+        stats = self.stats
+        run_start = [None]
+
+        def timed(name, func):
+            def wrapper(*args, **kwargs):
+                if run_start[0] is not None and name == "read_solution":
+                    stats.record("solver", run_start[0], time.perf_counter())
+                with stats.span(name) as span:
+                    result = func(*args, **kwargs)
+                    span.count = len(lp.constraints)
+                run_start[0] = time.perf_counter()
+                return result
+
+            return wrapper
+
+        write_name = "writeMPS" if use_mps else "writeLP"
+        setattr(lp, write_name, timed("write", getattr(lp, write_name)))
+        self.writesol = timed("write", self.writesol)
+        self.readsol_MPS = timed("read_solution", self.readsol_MPS)
+        try:
+            return self.solve_CBC(lp, use_mps=use_mps)
+        finally:
+            delattr(lp, write_name)
+            del self.writesol, self.readsol_MPS
+
+    def writesol(self, filename, lp, vs, variablesNames, constraintsNames):
+        values = np.array(
+            [np.nan if v.varValue is None else v.varValue for v in vs],
+            dtype=np_float,
+        )
+        with open(filename, "w") as f:
+            f.write("Stopped on time - objective value 0\n")
+            for j, (v, value) in enumerate(zip(vs, values.tolist())):
+                if value == value:
+                    f.write(f"{j:>7} {variablesNames[v.name]} {value:>15} {0:>23}\n")
+        return True
+
+
+def get_solver(*args, **kwargs):
+    """
+    Returns
+    -------
+    PULP_CBC_CMD
+        solver created from the arguments same as PULP_CBC_CMD of pulp
+    """
+    solver = PULP_CBC_CMD(*args, **kwargs)
+    if not solver.available():
+        raise pulp.PulpSolverError(f"Pulp: cannot execute {solver.path}")
+    return solver
+
+
+def cbc_arguments(solver, mps_file, sol_file, mst_file=None):
+    """command line of CBC, the same options as PULP_CBC_CMD are set
+
+    Parameters
+    ----------
+    solver : pulp.PULP_CBC_CMD
+    mps_file : str
+        minimize problem written by write_mps(rename=True, sense="Minimize")
+    sol_file : str
+        file where CBC writes the solution
+    mst_file : None or str
+        file of initial solution
+
+    Returns
+    -------
+    list of str
+    """
+    args = [solver.path, mps_file]
+    if mst_file is not None:
+        args += ["-mips", mst_file]
+    if solver.timeLimit is not None:
+        args += ["-sec", str(solver.timeLimit)]
+    if solver.optionsDict.get("presolve") is not None:
+        args += ["-presolve", "on" if solver.optionsDict["presolve"] else "off"]
+    if solver.optionsDict.get("cuts") is not None:
+        if solver.optionsDict["cuts"]:
+            args += ["-gomory", "on", "knapsack", "on", "probing", "on"]
+        else:
+            args += ["-cuts", "off"]
+    for option in solver.options + solver.getOptions():
+        args += ("-" + option).split()
+    args.append("-solve" if solver.mip else "-initialSolve")
+    args += ["-printingOptions", "all", "-solution", sol_file]
+    return args
+
+
+def read_solution(sol_file, num_variables):
+    """read the solution file of CBC
+
+    The variables are named X0000000, X0000001, ... by write_mps(rename=True),
+    so the values are decoded by the index in the names.
+
+    Parameters
+    ----------
+    sol_file : str
+    num_variables : int
+
+    Returns
+    -------
+    int, numpy.ndarray
+        status in pulp.LpStatus and values of variables
+    """
+    values = np.zeros(num_variables, dtype=np_float)
+    with open(sol_file) as f:
+        status_strs = f.readline().split()
+        status = cbc_status.get(status_strs[0], pulp.LpStatusUndefined)
+        if status == pulp.LpStatusNotSolved and len(status_strs) >= 5:
+            if status_strs[4] == "objective":
+                status = pulp.LpStatusOptimal
+        for line in f:
+            fields = line.split()
+            if len(fields) < 3:
+                break
+            if fields[0] == "**":
+                fields = fields[1:]
+            if fields[1][0] == "X":
+                values[int(fields[1][1:])] = float(fields[2])
+    return status, values
+
+
+def write_mst(values, mst_file):
+    """write initial solution of variables X0000000, X0000001, ... in CBC format
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        nan means no value
+    mst_file : str
+    """
+    with open(mst_file, "w") as f:
+        f.write("Stopped on time - objective value 0\n")
+        for j, value in enumerate(values.tolist()):
+            if value == value:
+                f.write(f"{j:>7} X{j:07d} {value:>15} {0:>23}\n")
+
+
+def solve_matrix(matrix, solver, tmp_dir, name="prob"):
+    """solve the problem of the matrix form by CBC
+
+    Parameters
+    ----------
+    matrix : LpMatrix
+    solver : pulp.PULP_CBC_CMD
+    tmp_dir : str
+        directory where the temporary files are written
+    name : str
+        prefix of the temporary files
+
+    Returns
+    -------
+    int, numpy.ndarray
+        status in pulp.LpStatus and values of variables
+    """
+    mps_file = os.path.join(tmp_dir, f"{name}.mps")
+    sol_file = os.path.join(tmp_dir, f"{name}.sol")
+    # CBC minimizes, the objective is negated for maximize problem
+    write_mps(matrix, mps_file, mip=solver.mip, rename=True, sense="Minimize")
+    args = cbc_arguments(solver, mps_file, sol_file)
+    pipe = None if solver.msg else subprocess.DEVNULL
+    if subprocess.run(args, stdout=pipe, stderr=pipe).returncode != 0:
+        raise pulp.PulpSolverError(
+            f"Pulp: Error while trying to execute, use msg=True for more details {solver.path}"
+        )
+    if not os.path.exists(sol_file):
+        raise pulp.PulpSolverError(f"Pulp: Error while executing {solver.path}")
+    status, values = read_solution(sol_file, matrix.numVariables())
+    for filename in (mps_file, sol_file):
+        os.remove(filename)
+    return status, values
+
+
+# base matrix and solver of the worker processes of LpProblem.solve_many
+_worker_matrix = None
+_worker_solver = None
+
+
+def init_worker(matrix, solver_kwargs):
+    global _worker_matrix, _worker_solver
+    _worker_matrix = matrix
+    _worker_solver = get_solver(**solver_kwargs)
+
+
+def solve_variant(delta):
+    """solve the base matrix modified by delta in the worker process
+
+    Parameters
+    ----------
+    delta : dict
+        keyword arguments of LpMatrix.modify()
+
+    Returns
+    -------
+    int, numpy.ndarray
+        status in pulp.LpStatus and values of variables
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        return solve_matrix(_worker_matrix.modify(**delta), _worker_solver, tmp_dir)
@@ -0,0 +1,372 @@
+import math
+import weakref
+
+from flopt import Variable, Sum
+from flopt.variable import VarElement
+from flopt.expression import Expression, Const, Reduction, MathOperation
+from flopt.constraint import Constraint
+from flopt.constants import VariableType
+from flopt.convert.linearize import linearize_expression
+from flopt.env import create_variable_mode
+
+from ppulp.parameter import LpParameter
+
+
+class Linearizer:
+    """Linearizer memoizes the linearized form of expressions
+
+    The linearized form of each expression is cached by its identity,
+    so that only new or edited expressions are linearized again.
+    The cache refers to the expressions weakly, and the entry of an
+    expression is dropped when it is replaced in the problem and collected.
+    The product variables created for variable-multiply and their constraints
+    are kept over calls and reused.
+    The expressions and constraints given are not modified, since they can be
+    shared by other problems, and the linearized ones are new objects.
+    The factors of each monomial are sorted before they are multiplied,
+    so the same monomial (and the same prefix of factors) written in any order
+    shares one product variable in the whole problem.
+
+    .. code-block:: python
+
+        from ppulp import *
+        from ppulp.linearize import Linearizer
+
+        x = LpVariable("x", cat="Binary")
+        y = LpVariable("y", cat="Binary")
+
+        linearizer = Linearizer()
+        e = linearizer.linearize(x * y)
+        >>> __0_mul
+        linearizer.linearize(2 * x * y)  # reuse __0_mul
+        >>> 2*__0_mul
+
+    Attributes
+    ----------
+    var_muls : dict
+        var_muls[var_a, var_b] = var_c, where var_c = var_a * var_b
+    linearized : dict
+        linearized[id(expression)] = (weak reference of expression,
+        linearized expression or None if it is the expression itself)
+    product_constraints : list of Constraint
+        all constraints created for the product variables
+    bounds_function : None or function
+        it returns the bounds {name: (lb, ub)} propagated by the constraints
+        including the given list of variables, which tighten the bounds of
+        products and their constraints.
+        It is called at most once for each variable in linearizeProblem().
+    """
+
+    def __init__(self):
+        self.var_muls = {}
+        self.linearized = {}
+        self.new_constraints = []
+        self.product_constraints = []
+        self.bounds_function = None
+        self._bounds = {}  # name -> propagated (lb, ub)
+
+    def linearize(self, exp):
+        """linearize a expression
+
+        Parameters
+        ----------
+        exp : Expression or VarElement
+
+        Returns
+        -------
+        Expression or VarElement
+            linearized expression
+
+        Notes
+        -----
+        Constraints for the product variables created in this call are stocked,
+        and popConstraints() returns them.
+        """
+        if isinstance(exp, (VarElement, Const)):
+            return exp
+        if id(exp) in self.linearized:
+            linear_exp = self.linearized[id(exp)][1]
+            return exp if linear_exp is None else linear_exp
+
+        num_var_muls = len(self.var_muls)
+        if exp.isLinear():
+            linear_exp = exp
+        elif exp.isPolynomial():
+            linear_exp = self._linearizePolynomial(exp)
+        else:
+            linear_exp = None
+        if linear_exp is None:
+            # flopt replaces the nodes of expression in place
+            linear_exp = linearize_expression(copy_expression(exp), self.var_muls)
+        self.setLinearized(exp, linear_exp)
+        self.setLinearized(linear_exp, linear_exp)
+
+        if len(self.var_muls) > num_var_muls:
+            var_muls = list(self.var_muls.items())[num_var_muls:]
+            for (var_a, var_b), var_mul in var_muls:
+                var_other = var_b if var_a.type() == VariableType.Binary else var_a
+                bounds = self.getBounds(var_other)
+                for const in var_mul_constraints(var_a, var_b, var_mul, bounds):
+                    self.setLinearized(const.expression, const.expression)
+                    self.new_constraints.append(const)
+                    self.product_constraints.append(const)
+        return linear_exp
+
+    def _linearizePolynomial(self, exp):
+        """linearize polynomial by the product variables of monomials
+
+        Returns
+        -------
+        None or Expression
+            None if a monomial includes a product of non-binary variables
+            or the expression includes parameters
+        """
+        if any(isinstance(elm, LpParameter) for elm in exp.traverse()):
+            return None  # the coefficients are evaluated in sync_pulp()
+        polynomial = exp.toPolynomial()
+        monomials = []
+        for mono, coeff in polynomial:
+            binaries, others = [], []
+            for var, power in mono.terms.items():
+                if var.type() == VariableType.Binary:
+                    binaries.append(var)  # x^k = x
+                elif power == 1:
+                    others.append(var)
+                else:
+                    return None
+            if len(others) > 1:
+                return None
+            factors = sorted(binaries, key=lambda var: var.name) + others
+            monomials.append((factors, coeff * mono.coeff))
+        terms = [coeff * self.product(factors) for factors, coeff in monomials]
+        return Sum(terms) + polynomial.constant()
+
+    def product(self, factors):
+        """product variable of factors
+
+        Parameters
+        ----------
+        factors : list of VarElement
+            binary variables and at most one non-binary variable at the end
+
+        Returns
+        -------
+        VarElement
+        """
+        var = factors[0]
+        for factor in factors[1:]:
+            var = self._varMul(var, factor)
+        return var
+
+    def _varMul(self, var_a, var_b):
+        var_a, var_b = sorted([var_a, var_b], key=lambda var: var.name)
+        if (var_a, var_b) in self.var_muls:
+            return self.var_muls[var_a, var_b]
+        value = var_a.value() * var_b.value()
+        if var_a.type() == var_b.type() == VariableType.Binary:
+            with create_variable_mode():
+                var_mul = Variable("mul", cat="Binary", ini_value=value)
+        else:
+            var_other = var_b if var_a.type() == VariableType.Binary else var_a
+            lb, ub = self.getBounds(var_other)
+            lb, ub = min(0, lb), max(0, ub)
+            with create_variable_mode():
+                var_mul = Variable(
+                    "mul",
+                    lowBound=None if lb == -math.inf else lb,
+                    upBound=None if ub == math.inf else ub,
+                    cat=(
+                        "Integer"
+                        if var_other.type() == VariableType.Integer
+                        else "Continuous"
+                    ),
+                    ini_value=value,
+                )
+        self.var_muls[var_a, var_b] = var_mul
+        return var_mul
+
+    def getBounds(self, var):
+        """bounds of variable tightened by the propagated bounds
+
+        Parameters
+        ----------
+        var : VarElement
+
+        Returns
+        -------
+        float, float
+            lower and upper bounds, -inf and inf for unbounded sides
+        """
+        if var.type() == VariableType.Binary:
+            return 0, 1
+        lb = -math.inf if var.getLb() is None else var.getLb()
+        ub = math.inf if var.getUb() is None else var.getUb()
+        if var.name not in self._bounds:
+            bounds = {} if self.bounds_function is None else self.bounds_function([var])
+            self._bounds[var.name] = bounds.get(var.name, (-math.inf, math.inf))
+        propagated_lb, propagated_ub = self._bounds[var.name]
+        return max(lb, propagated_lb), min(ub, propagated_ub)
+
+    def usesBounds(self):
+        """
+        Returns
+        -------
+        bool
+            whether the product constraints are made with the bounds of
+            non-binary variables, which are invalid when the bounds are relaxed
+        """
+        binary = VariableType.Binary
+        if any(a.type() != binary or b.type() != binary for a, b in self.var_muls):
+            return True
+        # three rows per product of binaries, the others are made by binarization
+        return len(self.product_constraints) > 3 * len(self.var_muls)
+
+    def setLinearized(self, exp, linear_exp):
+        if isinstance(exp, (VarElement, Const)):
+            return
+        linearized = self.linearized
+        key = id(exp)
+
+        def drop(ref):
+            if key in linearized and linearized[key][0] is ref:
+                del linearized[key]
+
+        # a linear expression is not stored as its own form, which keeps it alive
+        linearized[key] = (
+            weakref.ref(exp, drop),
+            None if linear_exp is exp else linear_exp,
+        )
+
+    def popConstraints(self):
+        """
+        Returns
+        -------
+        list of Constraint
+            constraints for product variables created after the last call
+        """
+        constraints = self.new_constraints
+        self.new_constraints = []
+        return constraints
+
+    def linearizeProblem(self, prob, constraints, objective=True):
+        """linearize the objective and constraints of problem
+
+        Parameters
+        ----------
+        prob : LpProblem
+        constraints : list of Constraint
+            constraints to be linearized, the nonlinear ones are replaced
+            in the list by the linearized constraints
+        objective : bool
+            if it is true, objective function is linearized
+
+        Returns
+        -------
+        list of Constraint
+            constraints for product variables created in linearization
+        """
+        self._bounds = {}
+        if objective:
+            prob.setObjective(self.linearize(prob.obj), prob.obj_name)
+        for i, const in enumerate(constraints):
+            exp = self.linearize(const.expression)
+            if exp is const.expression:
+                continue
+            if isinstance(exp, VarElement):
+                exp = Expression(exp, Const(0), "+")
+            constraints[i] = derived_constraint(const, exp)
+        return self.popConstraints()
+
+
+def copy_expression(e):
+    """copy the nodes of expression, the variables and constants are shared
+
+    Parameters
+    ----------
+    e : ExpressionElement, VarElement or number
+
+    Returns
+    -------
+    ExpressionElement, VarElement or number
+    """
+    if isinstance(e, Expression):
+        return Expression(copy_expression(e.elmA), copy_expression(e.elmB), e.operator)
+    if isinstance(e, Reduction):
+        return e.__class__([copy_expression(elm) for elm in e.elms])
+    if isinstance(e, MathOperation):
+        return e.__class__(copy_expression(e.elm))
+    return e
+
+
+def derived_constraint(const, exp):
+    """new constraint of the same type and name as const with expression exp
+
+    The source attribute keeps the constraint added by user or created for
+    the auxiliary variable, with which the problem looks up the information on it.
+
+    Parameters
+    ----------
+    const : Constraint
+    exp : Expression
+
+    Returns
+    -------
+    Constraint
+    """
+    derived = Constraint(exp, const.type(), const.name)
+    derived.source = source_constraint(const)
+    return derived
+
+
+def source_constraint(const):
+    """
+    Returns
+    -------
+    Constraint
+        constraint from which const is derived, or const itself
+    """
+    return getattr(const, "source", const)
+
+
+def var_mul_constraints(var_a, var_b, var_mul, bounds=None):
+    """create constraints of var_mul = var_a * var_b
+
+    Parameters
+    ----------
+    var_a : VarElement
+    var_b : VarElement
+    var_mul : VarElement
+    bounds : None or (float, float)
+        bounds of the non-binary variable used instead of its own bounds
+
+    Returns
+    -------
+    list of Constraint
+    """
+    constraints = []
+    # (Binary, Binary)
+    if {var_a.type(), var_b.type()} == {VariableType.Binary}:
+        constraints.append(var_mul <= var_a)
+        constraints.append(var_mul <= var_b)
+        constraints.append(var_mul >= var_a + var_b - 1)
+    # (Binary, Integer) or (Binary, Continuous)
+    elif {var_a.type(), var_b.type()} in (
+        {VariableType.Binary, VariableType.Integer},
+        {VariableType.Binary, VariableType.Continuous},
+    ):
+        if var_a.type() == VariableType.Binary:
+            var_bin, var_other = var_a, var_b
+        else:
+            var_bin, var_other = var_b, var_a
+        l = var_other.getLb(number=True)
+        u = var_other.getUb(number=True)
+        if bounds is not None:
+            l = l if bounds[0] == -math.inf else max(l, bounds[0])
+            u = u if bounds[1] == math.inf else min(u, bounds[1])
+        constraints.append(var_mul >= l * var_bin)
+        constraints.append(var_mul <= u * var_bin)
+        constraints.append(var_mul >= var_other - u * (1 - var_bin))
+        constraints.append(var_mul <= var_other - l * (1 - var_bin))
+    for i, const in enumerate(constraints, 1):
+        const.name = f"for_{var_mul.name}_{i}"
+    return constraints
@@ -0,0 +1,388 @@
+from array import array
+
+import numpy as np
+
+from flopt.variable import VarElement
+from flopt.expression import Expression, Const, Sum
+from flopt.constants import VariableType, ConstraintType, number_classes, np_float
+
+
+def linear_terms(exp):
+    """coefficients of linear expression
+
+    The expression tree is walked once without creating intermediate expressions.
+
+    Parameters
+    ----------
+    exp : Expression or VarElement
+        linear expression
+
+    Returns
+    -------
+    dict, float
+        coefficients of variables {var: coeff} and constant
+    """
+    terms = {}
+    constant = 0
+    stack = [(exp, 1)]
+    while stack:
+        e, k = stack.pop()
+        if isinstance(e, VarElement):
+            terms[e] = terms.get(e, 0) + k
+        elif isinstance(e, Const):
+            constant += k * e.value()
+        elif isinstance(e, number_classes):
+            constant += k * e
+        elif isinstance(e, Expression) and e.operator in {"+", "-"}:
+            stack.append((e.elmB, k if e.operator == "+" else -k))
+            stack.append((e.elmA, k))
+        elif (
+            isinstance(e, Expression)
+            and e.operator == "*"
+            and isinstance(e.elmA, Const)
+        ):
+            stack.append((e.elmB, k * e.elmA.value()))
+        elif (
+            isinstance(e, Expression)
+            and e.operator == "*"
+            and isinstance(e.elmB, Const)
+        ):
+            stack.append((e.elmA, k * e.elmB.value()))
+        elif (
+            isinstance(e, Expression)
+            and e.operator == "/"
+            and isinstance(e.elmB, Const)
+        ):
+            stack.append((e.elmA, k / e.elmB.value()))
+        elif isinstance(e, Sum):
+            stack.extend((elm, k) for elm in reversed(e.elms))
+        elif (
+            isinstance(e, Expression)
+            and e.operator == "*"
+            and not e.elmA.getVariables()
+        ):
+            # constant expression (e.g. including parameters) * expression
+            stack.append((e.elmB, k * e.elmA.value()))
+        elif (
+            isinstance(e, Expression)
+            and e.operator == "*"
+            and not e.elmB.getVariables()
+        ):
+            stack.append((e.elmA, k * e.elmB.value()))
+        else:
+            polynomial = e.toPolynomial()
+            if not polynomial.isLinear():
+                polynomial = polynomial.simplify()
+            assert polynomial.isLinear(), f"{e.getName()} is not linear"
+            for mono, coeff in polynomial:
+                (var,) = mono.terms
+                terms[var] = terms.get(var, 0) + k * coeff * mono.coeff
+            constant += k * polynomial.constant()
+    return terms, constant
+
+
+def term_signs(exp, names, signs=None):
+    """signs of the coefficients of variables in expression
+
+    The variables in nonlinear terms or multiplied by parameters
+    are given both signs.
+
+    Parameters
+    ----------
+    exp : Expression or VarElement
+    names : set of str
+        names of variables to be checked
+    signs : None or dict
+        signs are added to it if it is given
+
+    Returns
+    -------
+    dict
+        signs[name] = subset of {1, -1}
+    """
+    if signs is None:
+        signs = {}
+    stack = [(exp, 1)]
+    while stack:
+        e, k = stack.pop()
+        if isinstance(e, VarElement):
+            if e.name in names and k != 0:
+                signs.setdefault(e.name, set()).add(1 if k > 0 else -1)
+        elif isinstance(e, (Const, *number_classes)):
+            continue
+        elif isinstance(e, Expression) and e.operator in {"+", "-"}:
+            stack.append((e.elmB, k if e.operator == "+" else -k))
+            stack.append((e.elmA, k))
+        elif isinstance(e, Expression) and e.operator == "*" and type(e.elmB) is Const:
+            stack.append((e.elmA, k * e.elmB.value()))
+        elif isinstance(e, Expression) and e.operator == "/" and type(e.elmB) is Const:
+            stack.append((e.elmA, k / e.elmB.value()))
+        elif isinstance(e, Expression) and e.operator == "*" and type(e.elmA) is Const:
+            stack.append((e.elmB, k * e.elmA.value()))
+        elif isinstance(e, Sum):
+            stack.extend((elm, k) for elm in e.elms)
+        else:
+            for var in e.getVariables():
+                if var.name in names:
+                    signs.setdefault(var.name, set()).update((1, -1))
+    return signs
+
+
+class LpMatrix:
+    """Sparse matrix form of linear programming problem
+
+    ::
+
+      obj  c.T.dot(x) + C
+      s.t. row_lb <= A.dot(x) <= row_ub
+           lb <= x <= ub
+           x[i] is integer if integrality[i] == 1
+
+    Parameters
+    ----------
+    A : scipy.sparse.csr_matrix
+    row_lb : numpy.ndarray
+    row_ub : numpy.ndarray
+    lb : numpy.ndarray
+    ub : numpy.ndarray
+    integrality : numpy.ndarray
+    c : numpy.ndarray
+    C : float
+    sense : str
+        "Minimize" or "Maximize"
+    x : list of VarElement
+        variables of columns
+    var_names : list of str
+    const_names : list of str or None
+
+    Attributes
+    ----------
+    var_index : dict
+        var_index[name] = column index
+    const_index : dict
+        const_index[name] = row index of named constraints
+
+    Notes
+    -----
+    Unbounded sides of rows and columns are -numpy.inf or numpy.inf.
+    """
+
+    def __init__(
+        self,
+        A,
+        row_lb,
+        row_ub,
+        lb,
+        ub,
+        integrality,
+        c,
+        C=0,
+        sense="Minimize",
+        x=None,
+        var_names=None,
+        const_names=None,
+    ):
+        self.A = A
+        self.row_lb = row_lb
+        self.row_ub = row_ub
+        self.lb = lb
+        self.ub = ub
+        self.integrality = integrality
+        self.c = c
+        self.C = C
+        self.sense = sense
+        self.x = x
+        self.var_names = var_names
+        self.const_names = const_names
+        self.var_index = {}
+        if var_names is not None:
+            self.var_index = {name: j for j, name in enumerate(var_names)}
+        self.const_index = {}
+        if const_names is not None:
+            self.const_index = {
+                name: i for i, name in enumerate(const_names) if name is not None
+            }
+
+    @classmethod
+    def fromProblem(cls, prob):
+        """
+        Parameters
+        ----------
+        prob : LpProblem
+            linearized problem, its lp_matrix rows come first
+
+        Returns
+        -------
+        LpMatrix
+        """
+        from scipy import sparse
+
+        variables = []
+        var_index = {}
+        block = getattr(prob, "lp_matrix", None)
+        if block is not None:
+            variables.extend(block.x)
+            var_index.update(block.var_index)
+
+        def column(var):
+            if var.name not in var_index:
+                var_index[var.name] = len(variables)
+                variables.append(var)
+            return var_index[var.name]
+
+        # objective
+        obj_terms, C = linear_terms(prob.obj)
+        obj_cols = [column(var) for var in obj_terms]
+
+        # constraints
+        indptr = array("q", [0])
+        indices = array("q")
+        data = array("d")
+        row_lb = array("d")
+        row_ub = array("d")
+        const_names = []
+        for const in prob.getConstraints():
+            terms, constant = linear_terms(const.expression)
+            if not terms:
+                continue
+            for var, coeff in terms.items():
+                indices.append(column(var))
+                data.append(coeff)
+            indptr.append(len(indices))
+            if const.type() == ConstraintType.Eq:
+                row_lb.append(-constant)
+            else:  # const.type() == ConstraintType.Le
+                row_lb.append(-np.inf)
+            row_ub.append(-constant)
+            const_names.append(const.name)
+
+        num_variables = len(variables)
+        A = sparse.csr_matrix(
+            (
+                np.frombuffer(data, dtype=np_float),
+                np.frombuffer(indices, dtype=np.int64),
+                np.frombuffer(indptr, dtype=np.int64),
+            ),
+            shape=(len(const_names), num_variables),
+        )
+        row_lb = np.frombuffer(row_lb, dtype=np_float)
+        row_ub = np.frombuffer(row_ub, dtype=np_float)
+        if block is not None:
+            block_A = block.A.tocsr()
+            block_A = sparse.csr_matrix(
+                (block_A.data, block_A.indices, block_A.indptr),
+                shape=(block_A.shape[0], num_variables),
+            )
+            A = sparse.vstack([block_A, A], format="csr")
+            row_lb = np.concatenate([block.row_lb, row_lb])
+            row_ub = np.concatenate([block.row_ub, row_ub])
+            const_names = list(block.const_names) + const_names
+
+        c = np.zeros(num_variables, dtype=np_float)
+        np.add.at(c, obj_cols, list(obj_terms.values()))
+
+        lb = np.empty(num_variables, dtype=np_float)
+        ub = np.empty(num_variables, dtype=np_float)
+        integrality = np.zeros(num_variables, dtype=np.int8)
+        for j, var in enumerate(variables):
+            lb[j] = -np.inf if var.getLb() is None else var.getLb()
+            ub[j] = np.inf if var.getUb() is None else var.getUb()
+            if var.type() in {VariableType.Integer, VariableType.Binary}:
+                integrality[j] = 1
+
+        sense = "Maximize" if prob.sense.lower() == "maximize" else "Minimize"
+        return cls(
+            A,
+            row_lb,
+            row_ub,
+            lb,
+            ub,
+            integrality,
+            c,
+            C,
+            sense=sense,
+            x=variables,
+            var_names=list(var_index),
+            const_names=const_names,
+        )
+
+    def modify(self, c=None, lb=None, ub=None, rows=None):
+        """copy of the matrix whose entries are replaced
+
+        Arrays which are not modified are shared with this matrix.
+
+        Parameters
+        ----------
+        c : None or dict
+            c[j] = new objective coefficient of column j
+        lb : None or dict
+            lb[j] = new lower bound of column j
+        ub : None or dict
+            ub[j] = new upper bound of column j
+        rows : None or dict
+            rows[i] = (cols, coeffs, row_lb, row_ub), new row i
+
+        Returns
+        -------
+        LpMatrix
+        """
+
+        def replace(array, delta):
+            if not delta:
+                return array
+            array = array.copy()
+            array[list(delta)] = list(delta.values())
+            return array
+
+        A, row_lb, row_ub = self.A, self.row_lb, self.row_ub
+        if rows:
+            from scipy import sparse
+
+            keep = np.ones(self.numConstraints(), dtype=np_float)
+            keep[list(rows)] = 0
+            new_rows, new_cols, new_data = [], [], []
+            for i, (cols, coeffs, _, _) in rows.items():
+                new_rows.extend([i] * len(cols))
+                new_cols.extend(cols)
+                new_data.extend(coeffs)
+            A = sparse.diags(keep) @ A + sparse.csr_matrix(
+                (new_data, (new_rows, new_cols)), shape=A.shape
+            )
+            A.eliminate_zeros()
+            row_lb = replace(row_lb, {i: row[2] for i, row in rows.items()})
+            row_ub = replace(row_ub, {i: row[3] for i, row in rows.items()})
+
+        return LpMatrix(
+            A,
+            row_lb,
+            row_ub,
+            replace(self.lb, lb),
+            replace(self.ub, ub),
+            self.integrality,
+            replace(self.c, c),
+            self.C,
+            sense=self.sense,
+            x=self.x,
+            var_names=self.var_names,
+            const_names=self.const_names,
+        )
+
+    def numVariables(self):
+        return self.A.shape[1]
+
+    def numConstraints(self):
+        return self.A.shape[0]
+
+    def show(self, to_str=False):
+        s = f"LpMatrix\n"
+        s += f"  sense        : {self.sense}\n"
+        s += f"  #constraints : {self.numConstraints()}\n"
+        s += f"  #variables   : {self.numVariables()}"
+        s += f" (Integer {int(np.count_nonzero(self.integrality))})\n"
+        s += f"  #nonzeros    : {self.A.nnz}\n"
+        if to_str:
+            return s
+        print(s)
+
+    def __repr__(self):
+        return f"LpMatrix(A={self.A.shape}, nnz={self.A.nnz}, sense={self.sense})"
@@ -0,0 +1,86 @@
+from flopt.expression import ExpressionElement, Const
+
+
+class LpParameter(Const):
+    """Mutable constant used as a coefficient or a right-hand side
+
+    The rows and the objective including the parameter are updated
+    in the pulp model on the next solve(), the other rows are not rebuilt.
+
+    .. code-block:: python
+
+        from ppulp import *
+
+        x = LpVariable("x", lowBound=0)
+        demand = LpParameter("demand", 10)
+        price = LpParameter("price", 3)
+
+        prob = LpProblem(sense="Minimize")
+        prob += price * x
+        prob += x >= demand, "demand"
+        prob.solve()
+
+        demand.set(20)
+        price.set(4)
+        prob.solve()  # only the objective and "demand" row are updated
+        >>> x.value() == 20
+
+    Parameters
+    ----------
+    name : str
+        name of parameter
+    value : int or float
+        initial value
+
+    Attributes
+    ----------
+    version : int
+        incremented whenever the value is set
+    """
+
+    def __init__(self, name, value=0):
+        super().__init__(value)
+        self._name = name
+        self.version = 0
+
+    def set(self, value):
+        """set the value
+
+        Parameters
+        ----------
+        value : int or float
+        """
+        self._value = value
+        self.version += 1
+        self.polynomial = None
+
+    def getName(self):
+        return self._name
+
+    def clone(self, *args, **kwargs):
+        return self
+
+    def isNeg(self):
+        return False
+
+    # operations create expressions instead of folding the value
+    __add__ = ExpressionElement.__add__
+    __radd__ = ExpressionElement.__radd__
+    __sub__ = ExpressionElement.__sub__
+    __rsub__ = ExpressionElement.__rsub__
+    __mul__ = ExpressionElement.__mul__
+    __rmul__ = ExpressionElement.__rmul__
+    __truediv__ = ExpressionElement.__truediv__
+    __rtruediv__ = ExpressionElement.__rtruediv__
+    __pow__ = ExpressionElement.__pow__
+    __rpow__ = ExpressionElement.__rpow__
+    __neg__ = ExpressionElement.__neg__
+
+    def __hash__(self):
+        return id(self)
+
+    def __str__(self):
+        return self._name
+
+    def __repr__(self):
+        return f'LpParameter("{self._name}", {self._value})'
@@ -0,0 +1,169 @@
+import math
+
+TOL = 1e-9
+
+
+def presolve(rows, bounds, integers, protected=(), max_passes=10):
+    """reduce the rows of linear problem
+
+    The rows are reduced by the following rules until nothing changes.
+
+    - the fixed variables are substituted
+    - the rows without variables are removed, if they are satisfied
+    - the rows with one variable are converted into bounds of the variable
+    - the inequality rows which can not be violated in the bounds are removed
+    - the bounds of variables are tightened by the bounds of the others in rows
+    - the rows with the same coefficients as another row are removed,
+      but the tightest inequality row is kept
+
+    Parameters
+    ----------
+    rows : list of (dict, float, bool)
+        coefficients {name: coeff}, constant and whether the row is equality,
+        which means sum(coeff * x) + constant <= 0 (or == 0)
+    bounds : dict
+        bounds[name] = (lb, ub), -inf and inf for unbounded sides
+    integers : set of str
+        names of integer and binary variables
+    protected : set of str
+        names of variables which must not be substituted
+    max_passes : int
+        maximum number of passes over the rows
+
+    Returns
+    -------
+    None or (set of int, dict, dict)
+        None if the rows are infeasible, otherwise
+        indices of removed rows, tightened bounds and values of fixed variables
+    """
+    bounds = dict(bounds)
+    rows = [(dict(terms), constant, eq) for terms, constant, eq in rows]
+    removed = set()
+    fixed = {}
+
+    def tighten(name, lb, ub):
+        # returns None if the bounds are infeasible, otherwise whether changed
+        old_lb, old_ub = bounds[name]
+        if name in integers:
+            lb = lb if lb == -math.inf else math.ceil(lb - TOL)
+            ub = ub if ub == math.inf else math.floor(ub + TOL)
+        lb = lb if lb > old_lb + TOL else old_lb
+        ub = ub if ub < old_ub - TOL else old_ub
+        if lb > ub + TOL:
+            return None
+        bounds[name] = (lb, max(lb, ub))
+        return (lb, ub) != (old_lb, old_ub)
+
+    def fix_variables():
+        for name, (lb, ub) in bounds.items():
+            if ub - lb <= TOL and name not in fixed and name not in protected:
+                fixed[name] = lb
+
+    fix_variables()
+    for _ in range(max_passes):
+        changed = False
+        seen = {}  # coefficients -> index of row
+        for i, (terms, constant, eq) in enumerate(rows):
+            if i in removed:
+                continue
+            for name in [name for name in terms if name in fixed]:
+                constant += terms.pop(name) * fixed[name]
+            for name in [name for name, coeff in terms.items() if coeff == 0]:
+                del terms[name]
+            rows[i] = (terms, constant, eq)
+
+            if not terms:
+                if constant > TOL or (eq and constant < -TOL):
+                    return None
+                removed.add(i)
+                changed = True
+                continue
+
+            if len(terms) == 1:
+                ((name, coeff),) = terms.items()
+                value = -constant / coeff
+                if eq:
+                    feasible = tighten(name, value, value)
+                elif coeff > 0:
+                    feasible = tighten(name, -math.inf, value)
+                else:
+                    feasible = tighten(name, value, math.inf)
+                if feasible is None:
+                    return None
+                removed.add(i)
+                changed = True
+                continue
+
+            # activities are the finite parts and the numbers of infinite parts
+            contributions = []
+            min_activity = max_activity = constant
+            num_min_inf = num_max_inf = 0
+            for name, coeff in terms.items():
+                lb, ub = bounds[name]
+                if coeff < 0:
+                    lb, ub = ub, lb
+                low, high = coeff * lb, coeff * ub
+                contributions.append((name, coeff, low, high))
+                if low == -math.inf:
+                    num_min_inf += 1
+                else:
+                    min_activity += low
+                if high == math.inf:
+                    num_max_inf += 1
+                else:
+                    max_activity += high
+            if num_min_inf == 0 and min_activity > TOL:
+                return None
+            if eq and num_max_inf == 0 and max_activity < -TOL:
+                return None
+            if not eq and num_max_inf == 0 and max_activity <= TOL:
+                removed.add(i)
+                changed = True
+                continue
+
+            # bounds implied by the others in the row
+            for name, coeff, low, high in contributions:
+                lb, ub = -math.inf, math.inf
+                rest = _rest(min_activity, num_min_inf, low, -math.inf)
+                if rest is not None:
+                    limit = -rest / coeff
+                    lb, ub = (lb, limit) if coeff > 0 else (limit, ub)
+                rest = _rest(max_activity, num_max_inf, high, math.inf)
+                if eq and rest is not None:
+                    limit = -rest / coeff
+                    lb, ub = (max(lb, limit), ub) if coeff > 0 else (lb, min(ub, limit))
+                tightened = tighten(name, lb, ub)
+                if tightened is None:
+                    return None
+                changed |= tightened
+
+            key = (eq, tuple(sorted(terms.items())))
+            j = seen.get(key)
+            if j is None:
+                seen[key] = i
+                continue
+            if eq:
+                if abs(rows[j][1] - constant) > TOL:
+                    return None
+                removed.add(i)
+            elif constant > rows[j][1]:  # row i is tighter than row j
+                removed.add(j)
+                seen[key] = i
+            else:
+                removed.add(i)
+            changed = True
+
+        num_fixed = len(fixed)
+        fix_variables()
+        if not changed and len(fixed) == num_fixed:
+            break
+    return removed, bounds, fixed
+
+
+def _rest(activity, num_inf, part, inf):
+    # activity of the others in the row, None if it is infinite
+    if num_inf == 0:
+        return activity - part
+    if num_inf == 1 and part == inf:
+        return activity
+    return None
@@ -1,11 +1,50 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
 import pulp
 
 from flopt import Problem
 from flopt import Minimize
-from flopt.convert.linearize import linearize
-from flopt.convert._pulp import flopt_to_pulp
+from flopt.variable import VarElement, VarContinuous, VarInteger
+from flopt.expression import Const, Sum
+from flopt.convert.linearize import linearize, LinearizeError, NeedToBinarize
+from flopt.solvers.pulp_search import PulpSearch, LpVariable as PulpVariable
+from flopt.constants import VariableType, ConstraintType, np_float
+from flopt.env import setup_logger
+
+from ppulp.utils import (
+    VarElementWithConsts,
+    ImplicationRows,
+    IfThen,
+    get_value,
+)
+from ppulp.linearize import (
+    Linearizer,
+    copy_expression,
+    derived_constraint,
+    source_constraint,
+)
+from ppulp.parameter import LpParameter
+from ppulp.presolve import presolve
+from ppulp.stats import Stats
+from ppulp.matrix import LpMatrix, linear_terms, term_signs
+from ppulp.writer import write_lp, write_mps
+from ppulp.reader import read_lp, read_mps
+from ppulp.cbc import (
+    PULP_CBC_CMD,
+    get_solver,
+    write_mst,
+    cbc_arguments,
+    read_solution,
+    init_worker,
+    solve_variant,
+)
 
-from ppulp.utils import VarElementWithConsts
+logger = setup_logger(__name__)
 
 
 class LpProblem(Problem):
@@ -46,62 +85,1346 @@ class LpProblem(Problem):
     name : str
         name of problem
     sense : OptimizationType or str {"Minimize", "Maximize"}
+    presolve : bool
+        if it is true, the rows are reduced by presolve() before they are
+        pushed into the pulp model in set_pulp()
+    stats : bool
+        if it is true, the wall time and counts of the phases are recorded
+        in the stats attribute
 
+    Attributes
+    ----------
+    lp_matrix : None or LpMatrix
+        rows kept in the sparse matrix form, which is set by fromMatrix()
+    presolve_stats : None or dict
+        numbers of removed rows, fixed variables and tightened bounds
+        in the last presolve
+    stats : Stats
+        wall time and counts of the phases of solve(), writeLP() and writeMPS(),
+        such as "traverse", "linearize", "flopt_to_pulp", "write", "solver"
+        and "decode". Callbacks receive each span, see ppulp.stats.Stats.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, presolve=False, stats=False, **kwargs):
+        self.stats = Stats(enabled=stats)
         super().__init__(*args, **kwargs)
+        self.presolve = presolve
+        self.presolve_stats = None
+        self._presolve_removed = set()  # id(constraint) removed by presolve
+        self._presolve_bounds = {}  # name -> tightened (lb, ub)
+        self._presolve_fixed = {}  # name -> (variable, value)
         self.pulp_lp = None
         self.pulp_vars = None
         self.has_set_pulp_lp = True
         self.status = None
+        # change log of the pulp model
+        self._pulp_var_dict = {}  # name -> pulp variable
+        self._variables = []  # variables of this problem in order of pulp_vars
+        self._var_index = {}  # name -> index of pulp_vars
+        self._var_bounds = []  # (lowBound, upBound) of _variables pushed into pulp
+        self._solution = None
+        self._solution_index = {}
+        self._synced_constraints = None
+        self._num_synced_constraints = 0
+        self._has_set_objective = True
+        # whether terms were removed from the pulp model after the last solve
+        self._has_removed_terms = False
+        self._source_objective = self.obj  # objective before linearization
+        self._linearizer = Linearizer()
+        # parameters
+        self._parameters = {}  # LpParameter -> constraints including it
+        self._parameter_versions = {}  # LpParameter -> version at the last sync
+        self._objective_parameters = set()
+        # id(constraint) -> (pulp constraint, linearized constraint)
+        self._pulp_constraints = {}
+        self.lp_matrix = None
+        self._vars_with_consts = {}  # name -> VarElementWithConsts added
+        # auxiliary variables having LP forms
+        self._undecided_vars = []
+        self._lp_form_vars = {}  # name -> (variable, direction of LP form)
+        self._usage_signs = {}  # name -> signs in the checked constraints
+        self._lp_form_owners = {}  # id(constraint of LP form) -> name of variable
+        self._num_checked_constraints = 0
+        # name -> constraints of general form built from the current bounds
+        self._bound_dependent_rows = {}
+        # name of indicator variable -> None or (rows, big-M values) tightened
+        self._tightened_implications = {}
+        self._resetBoundRows()
+
+    @classmethod
+    def fromMatrix(cls, matrix, name=None):
+        """create the problem whose constraints are the rows of matrix
+
+        The rows are kept in the sparse matrix form (lp_matrix)
+        and only the variables of columns and the objective are created.
+        Constraints added later are appended to the rows.
+
+        Parameters
+        ----------
+        matrix : LpMatrix
+        name : str
+
+        Returns
+        -------
+        LpProblem
+        """
+        variables = []
+        for name_, lb, ub, integer in zip(
+            matrix.var_names,
+            matrix.lb.tolist(),
+            matrix.ub.tolist(),
+            matrix.integrality.tolist(),
+        ):
+            lb = None if lb == -np.inf else lb
+            ub = None if ub == np.inf else ub
+            if integer:
+                variables.append(VarInteger(name_, lb, ub, None))
+            else:
+                variables.append(VarContinuous(name_, lb, ub, None))
+
+        prob = cls(name=name, sense=matrix.sense)
+        prob.lp_matrix = LpMatrix(
+            matrix.A.tocsr(),
+            matrix.row_lb,
+            matrix.row_ub,
+            matrix.lb,
+            matrix.ub,
+            matrix.integrality,
+            np.zeros(len(variables), dtype=np_float),
+            sense=matrix.sense,
+            x=variables,
+            var_names=matrix.var_names,
+            const_names=matrix.const_names,
+        )
+        cols = np.flatnonzero(matrix.c).tolist()
+        obj = Const(matrix.C)
+        if cols:
+            obj = Sum([float(matrix.c[j]) * variables[j] for j in cols]) + matrix.C
+        prob.setObjective(obj)
+        return prob
+
+    @classmethod
+    def fromMPS(cls, filename, name=None):
+        """read the problem from MPS file
+
+        The file is memory-mapped and the rows are stocked in the sparse matrix form.
+
+        .. code-block:: python
 
-    def solve(self, *args, **kwargs):
+            prob.writeMPS("prob.mps")
+            prob = LpProblem.fromMPS("prob.mps")
+            prob.solve()
+
+        Parameters
+        ----------
+        filename : str or path-like
+            file in free MPS format, gzip file is accepted when it ends with ".gz"
+        name : str
+            name of problem
+
+        Returns
+        -------
+        LpProblem
+        """
+        return cls.fromMatrix(read_mps(filename), name=name)
+
+    @classmethod
+    def fromLP(cls, filename, name=None):
+        """read the problem from LP file
+
+        The file is memory-mapped and the rows are stocked in the sparse matrix form.
+
+        Parameters
+        ----------
+        filename : str or path-like
+            file in CPLEX LP format, gzip file is accepted when it ends with ".gz"
+        name : str
+            name of problem
+
+        Returns
+        -------
+        LpProblem
+        """
+        return cls.fromMatrix(read_lp(filename), name=name)
+
+    def solve(self, *args, warmStart=None, **kwargs):
         """solve this problem.
 
         We can use arguments same as PULP_CBC_CMD of pulp.
         `https://coin-or.github.io/pulp/technical/solvers.html#pulp.apis.PULP_CBC_CMD` shows the details of the arguments.
+
+        Parameters
+        ----------
+        warmStart : None or bool
+            if it is true, the current values of variables are passed to CBC as the MIP start.
+            if it is None, warm start is used when this problem has been solved before
         """
-        if self.has_set_pulp_lp:
-            self.set_pulp()
-            self.has_set_pulp_lp = False
+        with self.stats.span("solve"):
+            self.sync_pulp()
+            if warmStart is None:
+                warmStart = self.status is not None
+            if warmStart:
+                with self.stats.span("warm_start"):
+                    self.setInitialValues()
+            self._solve(args, kwargs, warmStart)
 
-        # solve
+            with self.stats.span("decode") as span:
+                values = np.array(
+                    [pulp_var.varValue for pulp_var in self.pulp_vars], dtype=np_float
+                )
+                if np.isnan(values).any():
+                    self._postsolve(values)
+                self.setSolutionArray(values)
+                for var, value in self._presolve_fixed.values():
+                    var.setValue(value)
+                span.count = len(values)
+        return self.status
+
+    def _solve(self, args, kwargs, warmStart):
+        if self._has_removed_terms:
+            self._dropUnusedPulpVariables()
+        if (args and isinstance(args[0], pulp.LpSolver)) or "solver" in kwargs:
+            with self.stats.span("solver"):
+                self.status = self.pulp_lp.solve(*args, **kwargs)
+            return
+        solver = PULP_CBC_CMD(*args, warmStart=warmStart, **kwargs)
+        solver.stats = self.stats
+        maximize = (
+            warmStart
+            and self.pulp_lp.sense == pulp.LpMaximize
+            and self.pulp_lp.objective is not None
+        )
+        if maximize:
+            # CBC mistakes the cost of MIP start with -max option,
+            # so the negated objective is minimized
+            objective = self.pulp_lp.objective
+            self.pulp_lp.setObjective(-objective)
+            self.pulp_lp.sense = pulp.LpMinimize
         try:
-            self.status = self.pulp_lp.solve(*args, **kwargs)
-        except TypeError:
-            solver = pulp.PULP_CBC_CMD(*args, **kwargs)
             self.status = self.pulp_lp.solve(solver=solver)
+        finally:
+            if maximize:
+                self.pulp_lp.setObjective(objective)
+                self.pulp_lp.sense = pulp.LpMaximize
+
+    def _dropUnusedPulpVariables(self):
+        """unregister the pulp variables which are left in neither the objective
+        nor the rows, because CBC rejects a column only in BOUNDS section
+        """
+        self._has_removed_terms = False
+        pulp_lp = self.pulp_lp
+        used = set()
+        if pulp_lp.objective is not None:
+            used.update(var.hash for var in pulp_lp.objective.keys())
+        for pulp_const in pulp_lp.constraints.values():
+            used.update(var.hash for var in pulp_const.keys())
+        if all(var.hash in used for var in pulp_lp._variables):
+            return
+        for var in pulp_lp._variables:
+            if var.hash not in used:
+                var.varValue = None  # the value is set in _postsolve()
+        pulp_lp._variables = [var for var in pulp_lp._variables if var.hash in used]
+        pulp_lp._variable_ids = {var.hash: var for var in pulp_lp._variables}
+
+    def _postsolve(self, values):
+        # variables only in the removed rows or the replaced objective
+        # are not passed to the solver
+        for i in np.flatnonzero(np.isnan(values)).tolist():
+            var = self._variables[i]
+            lb, ub = self._presolve_bounds.get(var.name, (var.getLb(), var.getUb()))
+            value = 0
+            if lb is not None and lb > -np.inf:
+                value = max(value, lb)
+            if ub is not None and ub < np.inf:
+                value = min(value, ub)
+            values[i] = value
+
+    def completeValues(self):
+        """set the values of the auxiliary variables computed from the values of
+        the other variables, so that the auxiliary constraints are satisfied.
+        The auxiliary variables are created by And, Or, Xor, Abs, PiecewiseLinear
+        and the linearization of products.
+        """
+        for var in sorted(
+            self._vars_with_consts.values(), key=lambda var: var.creation_order
+        ):
+            var.completeValue()
+        for (var_a, var_b), var_mul in self._linearizer.var_muls.items():
+            value_a, value_b = get_value(var_a), get_value(var_b)
+            if value_a is not None and value_b is not None:
+                var_mul.setValue(value_a * value_b)
+
+    def setInitialValues(self):
+        """set the current values of variables to the pulp variables as the MIP start"""
+        self.completeValues()
+        for var, pulp_var in zip(self._variables, self.pulp_vars):
+            pulp_var.varValue = self._initialValue(var)
+
+    @staticmethod
+    def _initialValue(var):
+        value = get_value(var)
+        if value is None:
+            return None
+        if var.getLb() is not None:
+            value = max(value, var.getLb())
+        if var.getUb() is not None:
+            value = min(value, var.getUb())
+        return value
+
+    async def solve_async(self, *args, timeout=None, warmStart=None, **kwargs):
+        """solve this problem without blocking the event loop
+
+        CBC runs as a child process of asyncio, and the child is killed
+        when the task is cancelled or the timeout expires.
+        The problem is passed by to_matrix(), so special ordered sets are not supported.
+        Compiling and writing the problem and decoding the solution run in
+        the default executor, so the problem must not be edited until it returns.
+
+        .. code-block:: python
 
-        # decode result
-        var_dict = {var.name: var for var in self.getVariables()}
+            import asyncio
 
-        for pulp_var in self.pulp_vars:
-            value = pulp_var.getValue()
-            var_dict[pulp_var.name].setValue(value)
+            async def main():
+                status = await prob.solve_async(msg=False, timeout=60)
+
+            asyncio.run(main())
+
+        Parameters
+        ----------
+        timeout : None or float
+            deadline in seconds, asyncio.TimeoutError is raised after the child is killed.
+            timeLimit of CBC can be used to get the best solution found in the time.
+        warmStart : None or bool
+            same as solve()
+        args, kwargs
+            arguments same as PULP_CBC_CMD of pulp
+
+        Returns
+        -------
+        int
+            status in pulp.LpStatus
+        """
+        loop = asyncio.get_running_loop()
+        solver = get_solver(*args, **kwargs)
+        if warmStart is None:
+            warmStart = self.status is not None
+
+        def prepare(mps_file, mst_file):
+            matrix = self.to_matrix()
+            # CBC minimizes, the objective is negated for maximize problem
+            write_mps(matrix, mps_file, mip=solver.mip, rename=True, sense="Minimize")
+            if warmStart:
+                self.completeValues()
+                initial_values = np.array(
+                    [self._initialValue(var) for var in matrix.x], dtype=np_float
+                )
+                write_mst(initial_values, mst_file)
+            return matrix
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mps_file = os.path.join(tmp_dir, "prob.mps")
+            sol_file = os.path.join(tmp_dir, "prob.sol")
+            mst_file = os.path.join(tmp_dir, "prob.mst") if warmStart else None
+            matrix = await loop.run_in_executor(None, prepare, mps_file, mst_file)
+            pipe = None if solver.msg else subprocess.DEVNULL
+            process = await asyncio.create_subprocess_exec(
+                *cbc_arguments(solver, mps_file, sol_file, mst_file),
+                stdin=subprocess.DEVNULL,
+                stdout=pipe,
+                stderr=pipe,
+            )
+            try:
+                returncode = await asyncio.wait_for(process.wait(), timeout)
+            except BaseException:
+                # cancelled or timeout
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+            if returncode != 0 or not os.path.exists(sol_file):
+                raise pulp.PulpSolverError(
+                    f"Pulp: Error while trying to execute, use msg=True for more details {solver.path}"
+                )
+            status, values = await loop.run_in_executor(
+                None, read_solution, sol_file, matrix.numVariables()
+            )
+
+        await loop.run_in_executor(
+            None, self.setSolutionArray, values, matrix.x, matrix.var_index
+        )
+        self.status = status
         return self.status
 
+    def solve_many(self, variants, workers=None, variables=None, **kwargs):
+        """solve the variants of this problem in parallel
+
+        The problem is compiled into the matrix form once,
+        and each variant is solved by CBC in a process pool after its deltas are applied.
+        Special ordered sets are not supported, as to_matrix().
+
+        .. code-block:: python
+
+            x = LpVariable("x", lowBound=0)
+            y = LpVariable("y", lowBound=0)
+
+            prob = LpProblem(sense="Maximize")
+            prob += 3 * x + 2 * y
+            prob += x + y <= 4, "c1"
+
+            variants = [
+                {"objective": {x: 1}},  # change the objective coefficient of x
+                {"upBound": {y: 1}},  # change the upper bound of y
+                {"constraints": {"c1": x + 2 * y <= 6}},  # replace the constraint c1
+            ]
+            statuses, solutions = prob.solve_many(variants, workers=4, variables=[x, y])
+            >>> [1, 1, 1]
+            >>> [[0. 4.] [4. 0.] [6. 0.]]
+
+        Parameters
+        ----------
+        variants : list of dict
+            each variant has some of the following keys,
+
+            - "objective": {variable: coefficient in objective}
+            - "lowBound": {variable: lower bound}
+            - "upBound": {variable: upper bound}
+            - "constraints": {constraint name: linear constraint which replaces it}
+
+            variable is VarElement or its name
+        workers : None or int
+            number of processes, os.cpu_count() is used if it is None
+        variables : None or list of VarElement
+            variables whose values are returned,
+            if it is None, all variables in the order of to_matrix().x
+        kwargs
+            arguments same as PULP_CBC_CMD of pulp
+
+        Returns
+        -------
+        list of int, numpy.ndarray
+            statuses and values of variables in the order of variants
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        get_solver(**kwargs)  # check the arguments
+        matrix = self.to_matrix()
+        deltas = [self._variantDelta(matrix, variant) for variant in variants]
+        base = matrix.modify()
+        base.x = None  # variables are not sent to the workers
+        if workers == 1:
+            init_worker(base, kwargs)
+            results = list(map(solve_variant, deltas))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker, initargs=(base, kwargs)
+            ) as executor:
+                results = list(executor.map(solve_variant, deltas))
+
+        statuses = [status for status, _ in results]
+        solutions = np.array([values for _, values in results], dtype=np_float).reshape(
+            len(results), matrix.numVariables()
+        )
+        if variables is not None:
+            index = [matrix.var_index[var.name] for var in variables]
+            solutions = solutions[:, index]
+        return statuses, solutions
+
+    @staticmethod
+    def _variantDelta(matrix, variant):
+        """convert a variant of solve_many into the arguments of LpMatrix.modify()"""
+        assert set(variant) <= {
+            "objective",
+            "lowBound",
+            "upBound",
+            "constraints",
+        }, f"unknown keys {set(variant)} in variant"
+
+        def column(var):
+            return matrix.var_index[var if isinstance(var, str) else var.name]
+
+        def values(key, default):
+            return {
+                column(var): default if value is None else value
+                for var, value in variant.get(key, {}).items()
+            }
+
+        rows = {}
+        for name, const in variant.get("constraints", {}).items():
+            terms, constant = linear_terms(const.expression)
+            if const.type() == ConstraintType.Eq:
+                row_lb = -constant
+            else:  # const.type() == ConstraintType.Le
+                row_lb = -np.inf
+            rows[matrix.const_index[name]] = (
+                [column(var) for var in terms],
+                list(terms.values()),
+                row_lb,
+                -constant,
+            )
+        return dict(
+            c=values("objective", 0),
+            lb=values("lowBound", -np.inf),
+            ub=values("upBound", np.inf),
+            rows=rows,
+        )
+
+    def setSolutionArray(self, values, variables=None, var_index=None):
+        """set values to variables in bulk
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            values[i] is the value of variables[i], and nan means no value
+        variables : None or list of VarElement
+            if it is None, the variables corresponding to pulp_vars
+        var_index : None or dict
+            var_index[name] = index of variables
+        """
+        if variables is None:
+            variables, var_index = self._variables, self._var_index
+        self._solution = values
+        self._solution_index = var_index
+        for var, value in zip(variables, values.tolist()):
+            var.setValue(None if value != value else value)
+        # the variables of LP forms can be loose when they are not in the objective
+        for name, (var, _) in self._lp_form_vars.items():
+            var.completeValue()
+            if name in var_index:
+                values[var_index[name]] = var.value()
+
+    def solution_array(self, variables=None):
+        """values of variables in the last solution
+
+        .. code-block:: python
+
+            prob.solve()
+            values = prob.solution_array()  # values[i] is value of prob.pulp_vars[i]
+            values = prob.solution_array([x, y])
+
+        Parameters
+        ----------
+        variables : None or list of VarElement
+            if it is None, the values are in the order of pulp_vars after solve(),
+            and in the order of to_matrix().x after solve_async()
+
+        Returns
+        -------
+        numpy.ndarray
+            nan is set for the variables without value
+        """
+        if self._solution is None:
+            return None
+        if variables is None:
+            return self._solution
+        index = np.fromiter(
+            (self._solution_index[var.name] for var in variables),
+            dtype=np.int64,
+            count=len(variables),
+        )
+        return self._solution[index]
+
     def linearize(self):
-        """linearize objective and constraints function"""
-        linearize(self)
+        """linearize objective and constraints function
+
+        The linearized form of each constraint and objective is memoized,
+        so only new or edited expressions are linearized again.
+        The nonlinear constraints are replaced by new linearized constraints,
+        and the constraints added by user are not modified.
+        """
+        with self.stats.span("formulations"):
+            self._refreshAuxBounds()
+            self._selectFormulations()
+            self._tightenBigM()
+        part = Problem(sense=self.sense)
+        part.obj = self.obj
+        part.constraints = list(self.constraints)
+        with self.stats.span("linearize") as span:
+            self._linearize(part)
+            span.count = len(self.constraints)
+        Problem.setObjective(self, part.obj, self.obj_name)
+        if len(part.constraints) > len(self.constraints):
+            self.has_set_pulp_lp = True
+        self.constraints[:] = part.constraints
+
+    def _selectFormulations(self):
+        """add the constraints of the auxiliary variables having LP forms
+
+        The LP form is selected when the problem prefers the values of the
+        variable only in the direction where the LP form is exact.
+        When a constraint added later breaks it, the general constraints
+        are added as well, which keeps the problem exact.
+        """
+        while self._undecided_vars or self._lp_form_vars:
+            undecided, self._undecided_vars = self._undecided_vars, []
+            names = {var.name for var in undecided} | set(self._lp_form_vars)
+            start = 0 if undecided else self._num_checked_constraints
+            for const in self.constraints[start:]:
+                signs = term_signs(const.expression, names)
+                owner = self._lp_form_owners.get(id(source_constraint(const)))
+                signs.pop(owner, None)
+                for name, sign in signs.items():
+                    if const.type() == ConstraintType.Eq:
+                        sign = {1, -1}
+                    self._usage_signs.setdefault(name, set()).update(sign)
+            self._num_checked_constraints = len(self.constraints)
+            obj_signs = term_signs(self.obj, names)
+            if self.sense.lower() == "maximize":
+                obj_signs = {
+                    name: {-s for s in signs} for name, signs in obj_signs.items()
+                }
+
+            num_constraints = len(self.constraints)
+            for var in undecided:
+                signs = self._usage_signs.get(var.name, set())
+                signs = signs | obj_signs.get(var.name, set())
+                direction = next((d for d in var.lp_forms if signs <= {d}), None)
+                if direction is None:
+                    self._addGeneralForm(var)
+                else:
+                    self._lp_form_vars[var.name] = (var, direction)
+                    for const in var.lp_forms[direction]:
+                        self._lp_form_owners[id(const)] = var.name
+                    self.addConstraints(var.lp_forms[direction])
+            for name, (var, direction) in list(self._lp_form_vars.items()):
+                signs = self._usage_signs.get(name, set())
+                signs = signs | obj_signs.get(name, set())
+                if not signs <= {direction}:
+                    del self._lp_form_vars[name]
+                    self._addGeneralForm(var)
+            if len(self.constraints) == num_constraints:
+                break
+
+    def _tightenBigM(self):
+        """build the big-M rows of the implications added after the last call
+        from the current bounds tightened by the bounds propagated by the constraints
+
+        The rows of the implications are left out of the propagation,
+        since they were built from the bounds which may be relaxed.
+        """
+        implications = [
+            var.implication
+            for var in self._vars_with_consts.values()
+            if getattr(var, "implication", None) is not None
+        ]
+        excluded = {id(row) for imp in implications for row in imp.constraints}
+        implications = [
+            imp
+            for imp in implications
+            if imp.indicator.name not in self._tightened_implications
+        ]
+        if not implications:
+            return
+        variables = [var for imp in implications for var in imp.variables()]
+        bounds = self._propagatedBounds(variables, excluded)
+        replaced = {}  # id(row of implication) -> tightened row of this problem
+        for implication in implications:
+            tightened = implication.tightenedRows(bounds)
+            if tightened is not None:
+                rows = [
+                    derived_constraint(row, new_row.expression)
+                    for row, new_row in zip(implication.constraints, tightened[0])
+                ]
+                replaced.update(zip(map(id, implication.constraints), rows))
+                tightened = rows, tightened[1]
+            self._tightened_implications[implication.indicator.name] = tightened
+        if replaced:
+            for i, const in enumerate(self.constraints):
+                if id(const) in replaced:
+                    self.constraints[i] = replaced[id(const)]
+
+    def _refreshAuxBounds(self):
+        """set the bounds of the auxiliary variables computed from
+        the current bounds of their arguments
+        """
+        for var in self._vars_with_consts.values():
+            if getattr(var, "bounds_function", None) is not None:
+                var.lowBound, var.upBound = var.bounds_function()
+
+    def _addGeneralForm(self, var):
+        constraints = var.constraints
+        if getattr(var, "constraints_function", None) is not None:
+            constraints = var.constraints_function()
+            if constraints is not None:
+                self._bound_dependent_rows[var.name] = constraints
+        assert constraints is not None, (
+            f"{var.name} is not only minimized in the problem, "
+            "set the bounds of its arguments"
+        )
+        self.addConstraints(constraints)
+
+    def _linearize(self, part):
+        """linearize part problem in place, and constraints created in linearization
+        are appended to part.constraints
+        """
+        self._linearizer.bounds_function = self._propagatedBounds
+        try:
+            part.constraints += self._linearizer.linearizeProblem(
+                part, part.constraints
+            )
+        except NeedToBinarize:
+            part.constraints += self._linearizer.popConstraints()
+            # flopt binarizes and linearizes the expressions in place
+            part.obj = copy_expression(part.obj)
+            part.constraints = [
+                derived_constraint(const, copy_expression(const.expression))
+                for const in part.constraints
+            ]
+            linearize(part)
+            self._linearizer.product_constraints += [
+                const for const in part.constraints if not hasattr(const, "source")
+            ]
+        except LinearizeError:
+            logger.error(f"this problem can not be linearized")
+        finally:
+            self._linearizer.bounds_function = None
+
+    def to_matrix(self):
+        """compile the linearized problem into sparse matrix form
+
+        .. code-block:: python
+
+            from ppulp import *
+
+            x = LpVariable("x", cat="Binary")
+            y = LpVariable("y", lowBound=0, upBound=3)
+
+            prob = LpProblem(sense="Maximize")
+            prob += x + 2 * y
+            prob += x + y <= 2, "c1"
+
+            m = prob.to_matrix()
+            m.A.toarray()
+            >>> [[1. 1.]]
+            m.row_lb, m.row_ub
+            >>> [-inf] [2.]
+            m.var_names, m.integrality
+            >>> ['x', 'y'] [1 0]
+
+        The special ordered sets of PiecewiseLinear(method="sos2") can not be
+        in matrix form, so ValueError is raised for them, and solve_async(),
+        solve_many() and writeMPS() using this raise it as well.
+
+        Returns
+        -------
+        LpMatrix
+            the constraint matrix A is scipy.sparse.csr_matrix
+        """
+        self.linearize()
+        if self.getSOS2():
+            raise ValueError(
+                "special ordered sets of PiecewiseLinear(method='sos2') can not be "
+                "in matrix form, use solve() or writeLP(), or another method"
+            )
+        with self.stats.span("to_matrix") as span:
+            matrix = LpMatrix.fromProblem(self)
+            span.count = matrix.numConstraints()
+        return matrix
+
+    def getSOS2(self):
+        """
+        Returns
+        -------
+        dict
+            name -> list of (variable, weight) of the special ordered sets
+            of type 2 created by the auxiliary variables
+        """
+        sos2 = {}
+        for var in self._vars_with_consts.values():
+            for i, (variables, weights) in enumerate(var.sos2):
+                sos2[f"{var.name}_{i}"] = list(zip(variables, weights))
+        return sos2
+
+    def getBigM(self):
+        """
+        .. code-block:: python
+
+            x = LpVariable("x", lowBound=0, upBound=10)
+            y = LpVariable("y", lowBound=-5, upBound=5)
+            prob += (x <= 3) >> (y >= 0)
+            prob.linearize()
+            prob.getBigM()
+            >>> {'for___0_ifthen_1': 3.00001, 'for___0_ifthen_2': 5}
+
+        Returns
+        -------
+        dict
+            name of row -> big-M value of the rows of the implications
+        """
+        big_m = {}
+        for name, var in self._vars_with_consts.items():
+            if getattr(var, "implication", None) is not None:
+                tightened = self._tightened_implications.get(name)
+                big_m.update(
+                    var.implication.big_m if tightened is None else tightened[1]
+                )
+        return big_m
+
+    def getIndicators(self):
+        """
+        Returns
+        -------
+        list of (VarBinary, Constraint)
+            the big-M rows of the implications which are satisfied with the bounds
+            of the variables when the indicator variable is 0,
+            they can be passed to the solver as indicator constraints
+        """
+        indicators = []
+        for name, var in self._vars_with_consts.items():
+            implication = getattr(var, "implication", None)
+            if implication is None:
+                continue
+            tightened = self._tightened_implications.get(name)
+            if tightened is None:
+                rows = implication.indicator_rows
+            else:
+                rows = tightened[0][implication.num_cond_rows :]
+            indicators += [(var, row) for row in rows]
+        return indicators
+
+    def sizeReport(self):
+        """size of the linearized problem broken down by the origin of
+        the variables and constraints
+
+        The origins are "user" for the variables and constraints added by user,
+        "And", "Or", "Xor", "Abs", "PiecewiseLinear" and "IfThen" for
+        the auxiliary ones, and "linearization" for the product variables.
+        An auxiliary variable not created by them belongs to the origin of
+        the first constraint including it.
+
+        .. code-block:: python
+
+            prob.sizeReport()
+            >>> {'user': {'variables': 2, 'constraints': 1, 'nonzeros': 2, 'memory': 1184},
+            >>>  'Abs': {'variables': 2, 'constraints': 4, 'nonzeros': 10, 'memory': 3912}}
+
+        Returns
+        -------
+        dict
+            dict[origin] = {"variables": int, "constraints": int,
+            "nonzeros": int, "memory": int}, where memory is the estimated
+            bytes of the Python objects
+        """
+        self.linearize()
+        row_origins = {}  # id(constraint) -> origin
+        var_origins = {}  # name -> origin
+        for var in self._vars_with_consts.values():
+            origin = var.origin or "user"
+            var_origins[var.name] = origin
+            rows = list(var.constraints or [])
+            rows += self._bound_dependent_rows.get(var.name, [])
+            for lp_form in var.lp_forms.values():
+                rows += lp_form
+            if getattr(var, "implication", None) is not None:
+                rows += var.implication.constraints
+            for const in rows:
+                row_origins.setdefault(id(const), origin)
+        for var_mul in self._linearizer.var_muls.values():
+            var_origins[var_mul.name] = "linearization"
+        for const in self._linearizer.product_constraints:
+            row_origins.setdefault(id(const), "linearization")
+
+        report = {}
+
+        def entry(origin):
+            if origin not in report:
+                report[origin] = dict(variables=0, constraints=0, nonzeros=0, memory=0)
+            return report[origin]
+
+        entry("user")
+        seen = set()
+        for const in self.constraints:
+            origin = row_origins.get(id(source_constraint(const)), "user")
+            terms, _ = linear_terms(const.expression)
+            size = entry(origin)
+            size["constraints"] += 1
+            size["nonzeros"] += len(terms)
+            size["memory"] += _memory_size(const, seen)
+            for var in terms:
+                if var.name.startswith("__"):  # created by create_variable_mode
+                    var_origins.setdefault(var.name, origin)
+        entry("user")["memory"] += _memory_size(self.obj, seen)
+        if self.lp_matrix is not None:
+            size = entry("user")
+            size["constraints"] += self.lp_matrix.numConstraints()
+            size["nonzeros"] += self.lp_matrix.A.nnz
+            A = self.lp_matrix.A
+            size["memory"] += A.data.nbytes + A.indices.nbytes + A.indptr.nbytes
+
+        for var in self.getVariables():
+            size = entry(var_origins.get(var.name, "user"))
+            size["variables"] += 1
+            size["memory"] += _memory_size(var, seen)
+        return report
+
+    def showSizeReport(self, to_str=False):
+        report = self.sizeReport()
+        total = {
+            key: sum(size[key] for size in report.values()) for key in report["user"]
+        }
+        s = f"SizeReport\n"
+        s += f"  {'origin':<16}{'variables':>12}{'constraints':>12}{'nonzeros':>12}{'memory':>14}\n"
+        for origin, size in [*report.items(), ("total", total)]:
+            s += f"  {origin:<16}"
+            s += f"{size['variables']:>12}{size['constraints']:>12}{size['nonzeros']:>12}"
+            s += f"{size['memory']:>14}\n"
+        if to_str:
+            return s
+        print(s)
 
     def set_pulp(self):
-        linearize(self)
-        self.pulp_lp, self.pulp_vars = flopt_to_pulp(self)
+        """build the pulp model from scratch"""
+        name = "NoName" if self.name is None else str(self.name).replace(" ", "_")
+        if self.sense.lower() == "maximize":
+            sense = pulp.LpMaximize
+        else:
+            sense = pulp.LpMinimize
+        self.pulp_lp = pulp.LpProblem(name=name, sense=sense)
+        self.pulp_vars = []
+        self._pulp_var_dict = {}
+        self._variables = []
+        self._var_index = {}
+        self._var_bounds = []
+        self._solution = None
+        self._synced_constraints = self.constraints
+        self._num_synced_constraints = 0
+        self._has_set_objective = True
+        self.has_set_pulp_lp = True
+        self._pulp_constraints = dict.fromkeys(self._pulp_constraints)
+        self._presolve_removed = set()
+        self._presolve_bounds = {}
+        self._presolve_fixed = {}
+        if self.presolve:
+            self.linearize()
+            with self.stats.span("presolve") as span:
+                self._presolve()
+                span.count = len(self.constraints)
+        if self.lp_matrix is not None:
+            with self.stats.span("flopt_to_pulp") as span:
+                self._addPulpRows(self.lp_matrix)
+                span.count = self.lp_matrix.numConstraints()
+        self.sync_pulp()
+        self._has_removed_terms = False  # new model
+
+    def _presolve(self):
+        """fix variables, remove redundant rows and tighten bounds by presolve()
+
+        The removed rows stay in this problem, so the reduction remains valid
+        for the constraints added later. The fixed variables are substituted
+        by constants in the pulp model and their values are set after solve().
+        The problem needs to be linearized before.
+        """
+        rows = self._linearRows()
+        if rows is None:
+            return  # not linearized
+        rows, constraints, variables, bounds, integers = rows
+        protected = {var.name for sos in self.getSOS2().values() for var, _ in sos}
+        if self.lp_matrix is not None:
+            protected |= set(self.lp_matrix.var_names)
+
+        result = presolve(rows, bounds, integers, protected)
+        if result is None:
+            return  # infeasible, which is reported by the solver
+        removed, new_bounds, fixed = result
+        self._presolve_removed = {id(constraints[i]) for i in removed}
+        self._presolve_bounds = {
+            name: new_bounds[name]
+            for name in bounds
+            if new_bounds[name] != bounds[name] and name not in fixed
+        }
+        for name, value in fixed.items():
+            self._presolve_fixed[name] = (variables[name], value)
+            self._pulp_var_dict[name] = Const(value)
+        self.presolve_stats = {
+            "removed_rows": len(removed),
+            "fixed_variables": len(fixed),
+            "tightened_bounds": len(self._presolve_bounds),
+        }
+
+    def _linearRows(self):
+        """rows of the linear constraints for presolve()
+
+        The constraints including parameters are skipped, because their rows
+        are updated later.
+
+        Returns
+        -------
+        None or (list, list of Constraint, dict, dict, set)
+            None if a constraint is not linear, otherwise rows, constraints
+            of rows, variables, bounds and names of integer variables for presolve()
+        """
+        rows, constraints = [], []
+        variables = {}
+        for const in self.constraints:
+            if id(source_constraint(const)) in self._pulp_constraints:
+                continue
+            try:
+                terms, constant = linear_terms(const.expression)
+            except AssertionError:
+                return None
+            for var in terms:
+                variables[var.name] = var
+            terms = {var.name: coeff for var, coeff in terms.items()}
+            rows.append((terms, constant, const.type() == ConstraintType.Eq))
+            constraints.append(const)
+        bounds, integers = _variable_bounds(variables)
+        return rows, constraints, variables, bounds, integers
+
+    def _resetBoundRows(self):
+        self._bound_rows = []  # rows of linear constraints for _propagatedBounds()
+        self._bound_row_sources = []  # id(source constraint) of _bound_rows
+        self._bound_row_indices = {}  # name -> indices of rows including variable
+        self._bound_row_vars = {}  # name -> variable
+        self._indexed_constraints = self.constraints
+        self._num_indexed_constraints = 0
+
+    def _indexBoundRows(self):
+        """append the rows of the linear constraints added after the last call
+        to the rows for _propagatedBounds()
+        """
+        if (
+            self._indexed_constraints is not self.constraints
+            or len(self.constraints) < self._num_indexed_constraints
+        ):
+            self._resetBoundRows()
+        for const in self.constraints[self._num_indexed_constraints :]:
+            if id(source_constraint(const)) in self._pulp_constraints:
+                continue  # the coefficients are changed by the parameters
+            try:
+                terms, constant = linear_terms(const.expression)
+            except AssertionError:
+                continue
+            index = len(self._bound_rows)
+            for var in terms:
+                self._bound_row_vars[var.name] = var
+                self._bound_row_indices.setdefault(var.name, []).append(index)
+            terms = {var.name: coeff for var, coeff in terms.items()}
+            self._bound_rows.append(
+                (terms, constant, const.type() == ConstraintType.Eq)
+            )
+            self._bound_row_sources.append(id(source_constraint(const)))
+        self._num_indexed_constraints = len(self.constraints)
+
+    def _propagatedBounds(self, variables=None, excluded=()):
+        """bounds of variables propagated by the linear constraints,
+        which tighten the products created in linearization and
+        the big-M values of the implications
+
+        The rows of the constraints are kept over calls,
+        and only the constraints added after the last call are read.
+
+        Parameters
+        ----------
+        variables : None or list of VarElement
+            if it is given, only the rows including them are propagated
+        excluded : set
+            id(source constraint) of the rows left out
+
+        Returns
+        -------
+        dict
+            bounds[name] = (lb, ub)
+        """
+        self._indexBoundRows()
+        if variables is None:
+            indices = range(len(self._bound_rows))
+        else:
+            indices = set()
+            for var in variables:
+                indices.update(self._bound_row_indices.get(var.name, []))
+            indices = sorted(indices)
+        rows = [
+            self._bound_rows[i]
+            for i in indices
+            if self._bound_row_sources[i] not in excluded
+        ]
+        names = {name for terms, _, _ in rows for name in terms}
+        bounds, integers = _variable_bounds(
+            {name: self._bound_row_vars[name] for name in names}
+        )
+        result = presolve(rows, bounds, integers, protected=names)
+        if result is None:
+            return {}  # infeasible, which is reported by the solver
+        return result[1]
+
+    def _addPulpRows(self, matrix):
+        for var in matrix.x:
+            self._addPulpVariable(var)
+        pulp_vars = [self._pulp_var_dict[var.name] for var in matrix.x]
+        A = matrix.A
+        for i, (lb, ub, name) in enumerate(
+            zip(matrix.row_lb.tolist(), matrix.row_ub.tolist(), matrix.const_names)
+        ):
+            start, end = A.indptr[i], A.indptr[i + 1]
+            exp = pulp.LpAffineExpression(
+                zip(
+                    [pulp_vars[j] for j in A.indices[start:end].tolist()],
+                    A.data[start:end].tolist(),
+                )
+            )
+            if lb == ub:
+                self.pulp_lp.addConstraint(exp == lb, name)
+                continue
+            if ub != np.inf:
+                self.pulp_lp.addConstraint(exp <= ub, name)
+                if lb != -np.inf and name is not None:
+                    name = f"{name}_lb"
+            if lb != -np.inf:
+                self.pulp_lp.addConstraint(exp >= lb, name)
+
+    def sync_pulp(self):
+        """push the objective and the constraints changed after the last synchronization
+        into the pulp model, so that the cost grows with the size of the change
+        instead of the size of the problem.
+        The pulp model is rebuilt by set_pulp() when the constraint list was replaced.
+        """
+        if (
+            self.pulp_lp is None
+            or self.constraints is not self._synced_constraints
+            or len(self.constraints) < self._num_synced_constraints
+        ):
+            self.set_pulp()
+            return
+        with self.stats.span("formulations"):
+            self._refreshAuxBounds()
+            self._selectFormulations()
+            self._tightenBigM()
+        with self.stats.span("parameters"):
+            self._syncParameters()
+        if not self._syncBounds():
+            self._resetLinearization()
+            self.set_pulp()
+            return
+        if not self.has_set_pulp_lp:
+            return
+
+        # linearize only the changed part
+        part = Problem(sense=self.sense)
+        if self._has_set_objective:
+            part.obj = self.obj
+        part.constraints = self.constraints[self._num_synced_constraints :]
+        num_new_constraints = len(part.constraints)
+        with self.stats.span("linearize") as span:
+            self._linearize(part)
+            span.count = num_new_constraints
+        with self.stats.span("flopt_to_pulp") as span:
+            span.count = self._pushPart(part)
+
+    def _pushPart(self, part):
+        """push the linearized part into the pulp model
+
+        Returns
+        -------
+        int
+            number of constraints of part
+        """
+        assert PulpSearch().available(part, verbose=True)
+        if self._has_set_objective:
+            Problem.setObjective(self, part.obj, self.obj_name)
+        # linearized constraints and constraints created by linearization
+        self.constraints[self._num_synced_constraints :] = part.constraints
+
+        # create pulp variables
+        for var in part.getVariables():
+            if var.name not in self._pulp_var_dict:
+                self._addPulpVariable(var)
+
+        # push objective and constraints
+        var_dict = self._pulp_var_dict
+        if self._has_set_objective:
+            obj = self.obj.value(var_dict=var_dict)
+            if isinstance(obj, (int, float)):
+                # constant, or all variables are fixed by presolve
+                obj = pulp.LpAffineExpression(constant=obj)
+            self._has_removed_terms = True
+            self.pulp_lp.setObjective(obj)
+        for const in part.constraints:
+            if id(const) in self._presolve_removed:
+                continue
+            const_exp = const.expression.value(var_dict=var_dict)
+            if isinstance(const_exp, (int, float)):
+                if const_exp <= 1e-9 and (
+                    const.type() == ConstraintType.Le or const_exp >= -1e-9
+                ):
+                    continue
+                # violated, the solver reports infeasibility
+                const_exp = pulp.LpAffineExpression(constant=const_exp)
+            if const.type() == ConstraintType.Eq:
+                pulp_const = const_exp == 0
+            else:  # const.type() == ConstraintType.Le
+                pulp_const = const_exp <= 0
+            self.pulp_lp.addConstraint(pulp_const, const.name)
+            key = id(source_constraint(const))
+            if key in self._pulp_constraints:
+                self._pulp_constraints[key] = (pulp_const, const)
+        for name, sos in self.getSOS2().items():
+            self.pulp_lp.sos2[name] = {var_dict[var.name]: w for var, w in sos}
+
+        self._num_synced_constraints = len(self.constraints)
+        self._has_set_objective = False
+        self.has_set_pulp_lp = False
+        return len(part.constraints)
+
+    def _syncBounds(self):
+        """update the bounds of the pulp variables whose flopt variables have
+        the bounds edited after the last synchronization
+
+        Returns
+        -------
+        bool
+            false if the pulp model needs to be rebuilt, because presolve
+            reduced it with the old bounds, or a bound is relaxed and
+            the products of linearization or the big-M rows were made with
+            the old bounds
+        """
+        bounds = [(var.lowBound, var.upBound) for var in self._variables]
+        if bounds == self._var_bounds:
+            return True
+        if self._presolve_removed or self._presolve_bounds or self._presolve_fixed:
+            return False
+        changed = [
+            i
+            for i, (old, new) in enumerate(zip(self._var_bounds, bounds))
+            if old != new
+        ]
+        relaxed = any(_relaxed(self._var_bounds[i], bounds[i]) for i in changed)
+        if relaxed and (
+            self._linearizer.usesBounds()
+            or self._tightened_implications
+            or self._bound_dependent_rows
+        ):
+            return False
+        for i in changed:
+            self.pulp_vars[i].lowBound, self.pulp_vars[i].upBound = bounds[i]
+        self._var_bounds = bounds
+        return True
+
+    def _resetLinearization(self):
+        """restore the objective and the constraints before linearization,
+        and discard the products and the general forms built from the bounds,
+        which are created again in the next linearization
+        """
+        discarded = {id(const) for const in self._linearizer.product_constraints}
+        discarded.update(
+            id(const) for rows in self._bound_dependent_rows.values() for const in rows
+        )
+        self.constraints[:] = [
+            source_constraint(const)
+            for const in self.constraints
+            if id(source_constraint(const)) not in discarded
+        ]
+        Problem.setObjective(self, self._source_objective, self.obj_name)
+        self._num_checked_constraints = len(self.constraints)
+        self._linearizer = Linearizer()
+        # the general forms are built again from the current bounds
+        self._undecided_vars += [
+            self._vars_with_consts[name] for name in self._bound_dependent_rows
+        ]
+        self._bound_dependent_rows = {}
+        self._tightened_implications = {}
+        self._resetBoundRows()
+
+    def _syncParameters(self):
+        """patch the rows of the pulp model including the parameters
+        whose values are changed after the last synchronization
+        """
+        keys = set()  # id(constraint) including the parameters changed
+        for param, version in self._parameter_versions.items():
+            if param.version == version:
+                continue
+            self._parameter_versions[param] = param.version
+            if param in self._objective_parameters:
+                self._has_set_objective = True
+                self.has_set_pulp_lp = True
+            for const in self._parameters.get(param, []):
+                keys.add(id(const))
+
+        for key in keys:
+            if self._pulp_constraints[key] is None:
+                continue  # not pushed yet
+            # the linearized constraint pushed
+            pulp_const, const = self._pulp_constraints[key]
+            const_exp = const.expression.value(var_dict=self._pulp_var_dict)
+            if isinstance(const_exp, (int, float)):
+                const_exp = pulp.LpAffineExpression(constant=const_exp)
+            pulp_const.expr = const_exp
+            pulp_const.constant = const_exp.constant
+            pulp_const.modified = True
+            self._has_removed_terms = True
+
+    def _addParameters(self, params, const=None):
+        for param in params:
+            self._parameter_versions.setdefault(param, param.version)
+            if const is not None:
+                self._parameters.setdefault(param, []).append(const)
+        if const is not None and params:
+            self._pulp_constraints.setdefault(id(const), None)
+
+    def _addPulpVariable(self, var):
+        if var.type() == VariableType.Continuous:
+            cat = "Continuous"
+        elif var.type() == VariableType.Integer:
+            cat = "Integer"
+        elif var.type() == VariableType.Binary:
+            cat = "Binary"
+        else:
+            raise ValueError(var.type())
+        lb, ub = var.getLb(), var.getUb()
+        if var.name in self._presolve_bounds:
+            lb, ub = self._presolve_bounds[var.name]
+            lb = None if lb == -np.inf else lb
+            ub = None if ub == np.inf else ub
+        pulp_var = PulpVariable(var.name, lowBound=lb, upBound=ub, cat=cat)
+        self._pulp_var_dict[var.name] = pulp_var
+        self._var_index[var.name] = len(self._variables)
+        self._variables.append(var)
+        self._var_bounds.append((var.lowBound, var.upBound))
+        self.pulp_vars.append(pulp_var)
 
     def setObjective(self, obj, *args, **kwargs):
         self.has_set_pulp_lp = True
+        self._has_set_objective = True
         super().setObjective(obj, *args, **kwargs)
-        for elm in obj.traverse():
-            if isinstance(elm, VarElementWithConsts):
-                elm.addConstsTo(self)
+        self._source_objective = self.obj
+        with self.stats.span("traverse") as span:
+            self._objective_parameters = self._traverse(obj)
+            span.count = 1
+        self._addParameters(self._objective_parameters)
+
+    def addConstraints(self, consts, name=None):
+        if isinstance(consts, ImplicationRows):
+            # (cond) >> (then), whose big-M rows are tightened by IfThen
+            consts = IfThen(consts.cond, consts.then)
+        super().addConstraints(consts, name)
 
     def addConstraint(self, const, *args, **kwargs):
         self.has_set_pulp_lp = True
         super().addConstraint(const, *args, **kwargs)
-        for elm in const.expression.traverse():
+        with self.stats.span("traverse") as span:
+            params = self._traverse(const.expression)
+            span.count = 1
+        self._addParameters(params, const)
+
+    def _traverse(self, exp):
+        """add the constraints of the auxiliary variables in expression
+
+        Returns
+        -------
+        set of LpParameter
+            parameters in expression
+        """
+        params = set()
+        for elm in exp.traverse():
             if isinstance(elm, VarElementWithConsts):
                 elm.addConstsTo(self)
+            elif isinstance(elm, LpParameter):
+                params.add(elm)
+        return params
+
+    def getVariables(self):
+        variables = super().getVariables()
+        if self.lp_matrix is not None:
+            variables |= set(self.lp_matrix.x)
+        return variables
 
     def variables(self):
         return self.getVariables()
@@ -110,14 +1433,176 @@ class LpProblem(Problem):
     def objective(self):
         return self.obj
 
-    def writeLP(self, *args, **kwargs):
-        """overwarp of pulp.LpProblem.writeLP"""
-        if self.has_set_pulp_lp:
-            self.set_pulp()
-        self.pulp_lp.writeLP(*args, **kwargs)
+    def writeLP(
+        self,
+        filename,
+        writeSOS=True,
+        mip=True,
+        max_length=100,
+        *,
+        chunk_size=10000,
+        compress=None,
+        indicators=False,
+    ):
+        """write the problem in LP format
 
-    def writeMPS(self, *args, **kwargs):
-        """overwarp of pulp.LpProblem.writeMPS"""
-        if self.has_set_pulp_lp:
-            self.set_pulp()
-        self.pulp_lp.writePS(*args, **kwargs)
+        Rows are streamed from the linearized expressions into the file per chunk
+        without building the pulp model.
+        The positional parameters are the same as pulp.LpProblem.writeLP.
+
+        .. code-block:: python
+
+            prob.writeLP("prob.lp")
+            prob.writeLP("prob.lp.gz")  # gzip compression
+
+        Parameters
+        ----------
+        filename : str or path-like
+        writeSOS : bool
+            if it is false, SOS section is not written
+        mip : bool
+            if it is false, integer and binary variables are written as continuous
+        max_length : int
+            maximum length of the lines of expressions
+        chunk_size : int
+            number of lines written at once
+        compress : None or bool
+            if it is true, the file is written with gzip.
+            if it is None, gzip is used when filename ends with ".gz"
+        indicators : bool
+            if it is true, the rows of getIndicators() are written as
+            indicator constraints instead of big-M rows
+        """
+        with self.stats.span("writeLP"):
+            self.linearize()
+            with self.stats.span("write") as span:
+                write_lp(
+                    self,
+                    filename,
+                    mip=mip,
+                    chunk_size=chunk_size,
+                    compress=compress,
+                    indicators=indicators,
+                    write_sos=writeSOS,
+                    max_length=max_length,
+                )
+                span.count = len(self.constraints)
+
+    def writeMPS(
+        self,
+        filename,
+        mpsSense=0,
+        rename=False,
+        mip=True,
+        with_objsense=False,
+        *,
+        chunk_size=10000,
+        compress=None,
+    ):
+        """write the problem in MPS format
+
+        The linearized problem is compiled into the sparse matrix form
+        and its columns are streamed into the file per chunk
+        without building the pulp model.
+        The positional parameters are the same as pulp.LpProblem.writeMPS.
+
+        Parameters
+        ----------
+        filename : str or path-like
+        mpsSense : int
+            pulp.LpMinimize or pulp.LpMaximize, the sense of the problem written
+            with the negated objective when it differs from this problem.
+            0 is the sense of this problem
+        rename : bool
+            if it is true, variables and constraints are named X0000000 and C0000000, ...
+        mip : bool
+            if it is false, integer variables are written as continuous
+        with_objsense : bool
+            if it is true, OBJSENSE section is written for maximize problem,
+            otherwise the sense is written in the comment line "*SENSE:Maximize"
+            as pulp does
+        chunk_size : int
+            number of lines written at once
+        compress : None or bool
+            if it is true, the file is written with gzip.
+            if it is None, gzip is used when filename ends with ".gz"
+        """
+        with self.stats.span("writeMPS"):
+            matrix = self.to_matrix()
+            with self.stats.span("write") as span:
+                write_mps(
+                    matrix,
+                    filename,
+                    mip=mip,
+                    chunk_size=chunk_size,
+                    compress=compress,
+                    rename=rename,
+                    with_objsense=with_objsense,
+                    sense={
+                        0: None,
+                        pulp.LpMinimize: "Minimize",
+                        pulp.LpMaximize: "Maximize",
+                    }[mpsSense],
+                )
+                span.count = matrix.numConstraints()
+
+
+def _variable_bounds(variables):
+    """
+    Parameters
+    ----------
+    variables : dict
+        name -> variable
+
+    Returns
+    -------
+    dict, set of str
+        bounds[name] = (lb, ub) and names of integer variables for presolve()
+    """
+    bounds = {}
+    for name, var in variables.items():
+        lb, ub = var.getLb(), var.getUb()
+        if var.type() == VariableType.Binary:
+            lb, ub = 0, 1
+        bounds[name] = (
+            -np.inf if lb is None else lb,
+            np.inf if ub is None else ub,
+        )
+    integers = {
+        name
+        for name, var in variables.items()
+        if var.type() in {VariableType.Integer, VariableType.Binary}
+    }
+    return bounds, integers
+
+
+def _relaxed(old, new):
+    """whether the bounds new (lowBound, upBound) are wider than old"""
+    (old_lb, old_ub), (new_lb, new_ub) = old, new
+    if old_lb is not None and (new_lb is None or new_lb < old_lb):
+        return True
+    return old_ub is not None and (new_ub is None or new_ub > old_ub)
+
+
+def _memory_size(obj, seen):
+    """estimated bytes of constraint, expression or variable,
+    the objects in seen are not counted again and the variables
+    in expressions are not counted
+    """
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj) + sys.getsizeof(getattr(obj, "__dict__", None))
+    if isinstance(obj, VarElement):
+        return size
+    expression = getattr(obj, "expression", None)  # Constraint
+    if expression is not None:
+        return size + _memory_size(expression, seen)
+    if hasattr(obj, "traverse"):
+        for elm in obj.traverse():
+            if id(elm) not in seen and not isinstance(elm, VarElement):
+                seen.add(id(elm))
+                size += sys.getsizeof(elm) + sys.getsizeof(
+                    getattr(elm, "__dict__", None)
+                )
+    return size
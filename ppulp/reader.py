@@ -0,0 +1,565 @@
+import gzip
+import io
+import mmap
+import os
+import re
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from flopt.constants import np_float
+
+from ppulp.matrix import LpMatrix
+
+
+@contextmanager
+def map_file(filename):
+    """memory-map the file to read
+
+    Parameters
+    ----------
+    filename : str or path-like
+        gzip file (ends with ".gz") is decompressed into memory
+
+    Yields
+    ------
+    mmap.mmap or bytes
+    """
+    filename = str(filename)
+    if filename.endswith(".gz"):
+        with gzip.open(filename, "rb") as f:
+            yield f.read()
+        return
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def read_lines(buf):
+    """iterate lines of memory-mapped file or bytes"""
+    if not isinstance(buf, mmap.mmap):
+        buf = io.BytesIO(buf)
+    return iter(buf.readline, b"")
+
+
+def make_matrix(
+    rows, cols, data, num_rows, row_lb, row_ub, var_names, lb, ub, integrality, **kwargs
+):
+    """create LpMatrix from coordinate form of constraint matrix"""
+    from scipy import sparse
+
+    num_variables = len(var_names)
+    A = sparse.csr_matrix(
+        (
+            np.frombuffer(data, dtype=np_float),
+            (np.frombuffer(rows, dtype=np.int64), np.frombuffer(cols, dtype=np.int64)),
+        ),
+        shape=(num_rows, num_variables),
+    )
+    A.sum_duplicates()
+    return LpMatrix(
+        A,
+        np.asarray(row_lb, dtype=np_float),
+        np.asarray(row_ub, dtype=np_float),
+        np.asarray(lb, dtype=np_float),
+        np.asarray(ub, dtype=np_float),
+        np.frombuffer(integrality, dtype=np.int8).copy(),
+        var_names=var_names,
+        **kwargs,
+    )
+
+
+def read_mps(filename):
+    """read a problem in free MPS format
+
+    Lines are split into fields and the coefficients are stocked
+    in typed arrays, no Python object is kept per coefficient.
+    The sense is read from OBJSENSE section or the comment line
+    "*SENSE:Maximize" written by pulp, and it is Minimize without them.
+
+    Parameters
+    ----------
+    filename : str or path-like
+
+    Returns
+    -------
+    LpMatrix
+        the variables are not created (x is None)
+    """
+    sense = "Minimize"
+    obj_name = None
+    row_index = {}  # name -> row index, objective is -1 and other free rows are None
+    row_types = bytearray()
+    const_names = []
+    col_index = {}
+    var_names = []
+    integrality = array("b")
+    rows = array("q")
+    cols = array("q")
+    data = array("d")
+    c = {}
+    C = 0
+    rhs = None
+    ranges = None
+    lb = ub = None
+
+    with map_file(filename) as buf:
+        section = None
+        integer = False
+        for line in read_lines(buf):
+            if line.startswith(b"*"):
+                # pulp writes the sense in the comment line "*SENSE:Maximize"
+                if line[1:7].upper() == b"SENSE:":
+                    is_max = line[7:].strip().upper()[:3] == b"MAX"
+                    sense = "Maximize" if is_max else "Minimize"
+                continue
+            if not line.strip():
+                continue
+            fields = line.split()
+            if not line[:1].isspace():
+                section = fields[0].upper()
+                if section == b"OBJSENSE" and len(fields) > 1:
+                    sense = "Maximize" if fields[1].upper()[:3] == b"MAX" else sense
+                elif section == b"COLUMNS":
+                    num_rows = len(const_names)
+                    rhs = np.zeros(num_rows, dtype=np_float)
+                    ranges = np.full(num_rows, np.nan, dtype=np_float)
+                elif section == b"BOUNDS":
+                    lb = np.zeros(len(var_names), dtype=np_float)
+                    ub = np.full(len(var_names), np.inf, dtype=np_float)
+                elif section in {b"SOS", b"INDICATORS"}:
+                    raise ValueError(f"{section.decode()} section is not supported")
+                continue
+
+            if section == b"COLUMNS":
+                if fields[1] == b"'MARKER'":
+                    integer = fields[2] == b"'INTORG'"
+                    continue
+                j = col_index.get(fields[0])
+                if j is None:
+                    j = col_index[fields[0]] = len(var_names)
+                    var_names.append(fields[0].decode())
+                    integrality.append(integer)
+                for row, value in zip(fields[1::2], fields[2::2]):
+                    i = row_index[row]
+                    if i is None:
+                        continue
+                    if i < 0:
+                        c[j] = c.get(j, 0) + float(value)
+                    else:
+                        rows.append(i)
+                        cols.append(j)
+                        data.append(float(value))
+            elif section in {b"RHS", b"RANGES"}:
+                start = len(fields) % 2
+                for row, value in zip(fields[start::2], fields[start + 1 :: 2]):
+                    i = row_index[row]
+                    if i is None:
+                        continue
+                    if i < 0:
+                        if section == b"RHS":
+                            C = -float(value)
+                    elif section == b"RHS":
+                        rhs[i] = float(value)
+                    else:
+                        ranges[i] = float(value)
+            elif section == b"BOUNDS":
+                bound_type = fields[0].upper()
+                rest = fields[1:]
+                if len(rest) >= 2 and rest[1] in col_index:
+                    j = col_index[rest[1]]
+                    value = float(rest[2]) if len(rest) > 2 else None
+                else:
+                    j = col_index[rest[0]]
+                    value = float(rest[1]) if len(rest) > 1 else None
+                if bound_type == b"UP":
+                    ub[j] = value
+                    if value < 0 and lb[j] == 0:
+                        lb[j] = -np.inf
+                elif bound_type == b"LO":
+                    lb[j] = value
+                elif bound_type == b"FX":
+                    lb[j] = ub[j] = value
+                elif bound_type == b"FR":
+                    lb[j], ub[j] = -np.inf, np.inf
+                elif bound_type == b"MI":
+                    lb[j] = -np.inf
+                elif bound_type == b"PL":
+                    ub[j] = np.inf
+                elif bound_type == b"BV":
+                    lb[j], ub[j] = 0, 1
+                    integrality[j] = 1
+                elif bound_type == b"LI":
+                    lb[j] = value
+                    integrality[j] = 1
+                elif bound_type == b"UI":
+                    ub[j] = value
+                    integrality[j] = 1
+                else:
+                    raise ValueError(f"unsupported bound type {bound_type.decode()}")
+            elif section == b"ROWS":
+                row_type, row = fields[0].upper(), fields[1]
+                if row_type == b"N":
+                    if obj_name is None:
+                        obj_name = row
+                        row_index[row] = -1
+                    else:
+                        row_index[row] = None
+                else:
+                    row_index[row] = len(const_names)
+                    const_names.append(row.decode())
+                    row_types.append(row_type[0])
+            elif section == b"OBJSENSE":
+                if fields[0].upper()[:3] == b"MAX":
+                    sense = "Maximize"
+
+    num_rows = len(const_names)
+    if rhs is None:
+        rhs = np.zeros(num_rows, dtype=np_float)
+        ranges = np.full(num_rows, np.nan, dtype=np_float)
+    if lb is None:
+        lb = np.zeros(len(var_names), dtype=np_float)
+        ub = np.full(len(var_names), np.inf, dtype=np_float)
+
+    # row bounds
+    row_types = np.frombuffer(bytes(row_types), dtype="S1")
+    row_lb = np.where(row_types == b"L", -np.inf, rhs)
+    row_ub = np.where(row_types == b"G", np.inf, rhs)
+    has_range = ~np.isnan(ranges)
+    R = np.abs(ranges)
+    lower = has_range & ((row_types == b"L") | ((row_types == b"E") & (ranges < 0)))
+    upper = has_range & ((row_types == b"G") | ((row_types == b"E") & (ranges > 0)))
+    row_lb[lower] = rhs[lower] - R[lower]
+    row_ub[upper] = rhs[upper] + R[upper]
+
+    objective = np.zeros(len(var_names), dtype=np_float)
+    objective[list(c)] = list(c.values())
+    return make_matrix(
+        rows,
+        cols,
+        data,
+        num_rows,
+        row_lb,
+        row_ub,
+        var_names,
+        lb,
+        ub,
+        integrality,
+        c=objective,
+        C=C,
+        sense=sense,
+        const_names=const_names,
+    )
+
+
+_lp_token = re.compile(
+    rb"(?P<comment>\\[^\n]*)"
+    rb"|(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    rb"|(?P<op><=|>=|=<|=>|[<>=])"
+    rb"|(?P<sign>[+-])"
+    rb"|(?P<colon>:)"
+    rb"|(?P<name>[^\s\\:<>=+\-]+)"
+)
+
+_lp_sections = {
+    b"minimize": "Minimize",
+    b"minimise": "Minimize",
+    b"minimum": "Minimize",
+    b"min": "Minimize",
+    b"maximize": "Maximize",
+    b"maximise": "Maximize",
+    b"maximum": "Maximize",
+    b"max": "Maximize",
+    b"subject": "Subject",
+    b"such": "Subject",
+    b"st": "Subject",
+    b"s.t.": "Subject",
+    b"bounds": "Bounds",
+    b"bound": "Bounds",
+    b"generals": "Generals",
+    b"general": "Generals",
+    b"gen": "Generals",
+    b"binaries": "Binaries",
+    b"binary": "Binaries",
+    b"bin": "Binaries",
+    b"end": "End",
+    b"sos": "SOS",
+    b"semi": "Semi-continuous",
+    b"semis": "Semi-continuous",
+}
+
+_lp_unsupported = {"SOS", "Semi-continuous"}
+
+_lp_ops = {
+    b"<": "<=",
+    b"<=": "<=",
+    b"=<": "<=",
+    b">": ">=",
+    b">=": ">=",
+    b"=>": ">=",
+    b"=": "=",
+}
+
+_lp_infinity = {b"inf", b"infinity"}
+
+
+class LpTokens:
+    """tokens of LP format scanned lazily by one regular expression
+
+    The tokens are indexed by the position in the file, and the tokens
+    before the position given to release() are discarded,
+    so only the tokens of the current statement are kept.
+    ("end", b"") is returned after the last token.
+
+    Parameters
+    ----------
+    buf : mmap.mmap or bytes
+    """
+
+    def __init__(self, buf):
+        self._matches = (
+            (m.lastgroup, m.group())
+            for m in _lp_token.finditer(buf)
+            if m.lastgroup != "comment"
+        )
+        self._tokens = deque()
+        self._offset = 0  # position of self._tokens[0]
+
+    def __getitem__(self, k):
+        i = k - self._offset
+        while i >= len(self._tokens):
+            self._tokens.append(next(self._matches, ("end", b"")))
+        return self._tokens[i]
+
+    def release(self, k):
+        while self._offset < k and self._tokens:
+            self._tokens.popleft()
+            self._offset += 1
+
+    def close(self):
+        """stop the scan, which releases the buffer"""
+        self._matches.close()
+
+
+def read_lp(filename):
+    """read a problem in CPLEX LP format
+
+    The file is tokenized lazily by one regular expression scan
+    and the coefficients are stocked in typed arrays,
+    no Python object is kept per coefficient.
+    SOS, semi-continuous and indicator constraints are not supported.
+
+    Parameters
+    ----------
+    filename : str or path-like
+
+    Returns
+    -------
+    LpMatrix
+        the variables are not created (x is None)
+    """
+    with map_file(filename) as buf:
+        tokens = LpTokens(buf)
+        try:
+            return _read_lp_tokens(tokens)
+        finally:
+            tokens.close()
+
+
+def _read_lp_tokens(tokens):
+    sense = "Minimize"
+    col_index = {}
+    var_names = []
+    lb = array("d")
+    ub = array("d")
+    integrality = array("b")
+    rows = array("q")
+    cols = array("q")
+    data = array("d")
+    row_lb = array("d")
+    row_ub = array("d")
+    const_names = []
+    obj_cols = array("q")
+    obj_data = array("d")
+    C = 0
+
+    def column(name):
+        j = col_index.get(name)
+        if j is None:
+            j = col_index[name] = len(var_names)
+            var_names.append(name.decode())
+            lb.append(0)
+            ub.append(np.inf)
+            integrality.append(0)
+        return j
+
+    def section_at(k):
+        kind, token = tokens[k]
+        if kind == "end":
+            return "End"
+        if kind != "name":
+            return None
+        section = _lp_sections.get(token.lower())
+        if section == "Subject" and token.lower() in {b"subject", b"such"}:
+            k += 1  # "Subject To" or "such that"
+        return section
+
+    def skip_section(k):
+        kind, token = tokens[k]
+        if token.lower() in {b"subject", b"such"}:
+            return k + 2
+        return k + 1
+
+    def value_at(k):
+        """[sign] number or [sign] inf"""
+        sign = 1
+        if tokens[k][0] == "sign":
+            sign = -1 if tokens[k][1] == b"-" else 1
+            k += 1
+        kind, token = tokens[k]
+        if kind == "number":
+            return sign * float(token), k + 1
+        if token.lower() not in _lp_infinity:
+            raise ValueError(f"number is expected, got {token.decode()}")
+        return sign * np.inf, k + 1
+
+    def op_at(k):
+        op = _lp_ops.get(tokens[k][1])
+        if tokens[k][0] != "op" or op is None:
+            raise ValueError(f"comparison is expected, got {tokens[k][1].decode()}")
+        return op
+
+    def terms_at(k, col_array, data_array):
+        """linear terms, returns constant and next position"""
+        constant = 0
+        first = True
+        while True:
+            kind, token = tokens[k]
+            if kind == "sign":
+                coeff = -1.0 if token == b"-" else 1.0
+                k += 1
+                kind, token = tokens[k]
+            elif first:
+                coeff = 1.0
+            else:
+                return constant, k
+            first = False
+            if kind == "number":
+                coeff *= float(token)
+                k += 1
+                kind, token = tokens[k]
+                if kind != "name" or section_at(k) is not None:
+                    constant += coeff
+                    continue
+            if kind != "name" or section_at(k) is not None:
+                return constant, k
+            col_array.append(column(token))
+            data_array.append(coeff)
+            k += 1
+
+    def name_at(k):
+        if tokens[k][0] == "name" and tokens[k + 1][0] == "colon":
+            return tokens[k][1].decode(), k + 2
+        return None, k
+
+    k = 0
+    section = None
+    while True:
+        tokens.release(k)
+        next_section = section_at(k)
+        if next_section is not None:
+            section = next_section
+            if section == "End":
+                break
+            if section in _lp_unsupported:
+                raise ValueError(f"{section} section is not supported")
+            if section in {"Minimize", "Maximize"}:
+                sense = section
+            k = skip_section(k)
+            continue
+
+        if section in {"Minimize", "Maximize"}:
+            start = k
+            _, k = name_at(k)
+            constant, k = terms_at(k, obj_cols, obj_data)
+            C += constant
+            if k == start:
+                raise ValueError(f"unexpected token {tokens[k][1].decode()}")
+        elif section == "Subject":
+            name, k = name_at(k)
+            num_rows = len(const_names)
+            constant, k = terms_at(k, cols, data)
+            rows.extend([num_rows] * (len(cols) - len(rows)))
+            op = op_at(k)
+            rhs, k = value_at(k + 1)
+            if tokens[k] == ("sign", b"-") and tokens[k + 1] == ("op", b">"):
+                raise ValueError(f"indicator constraint {name} is not supported")
+            rhs -= constant
+            row_lb.append(-np.inf if op == "<=" else rhs)
+            row_ub.append(np.inf if op == ">=" else rhs)
+            const_names.append(name)
+        elif section == "Bounds":
+            if tokens[k][0] == "name" and tokens[k][1].lower() not in _lp_infinity:
+                j = column(tokens[k][1])
+                if tokens[k + 1][1].lower() == b"free":
+                    lb[j], ub[j] = -np.inf, np.inf
+                    k += 2
+                    continue
+                op = op_at(k + 1)
+                value, k = value_at(k + 2)
+            else:
+                value, k = value_at(k)
+                op = op_at(k)
+                op = {"<=": ">=", ">=": "<=", "=": "="}[op]
+                j = column(tokens[k + 1][1])
+                k += 2
+                if tokens[k][0] == "op":
+                    # l <= x <= u
+                    if op == ">=":
+                        lb[j] = value
+                    else:
+                        ub[j] = value
+                    op = op_at(k)
+                    value, k = value_at(k + 1)
+            if op == "<=":
+                ub[j] = value
+            elif op == ">=":
+                lb[j] = value
+            else:
+                lb[j] = ub[j] = value
+        elif section in {"Generals", "Binaries"}:
+            j = column(tokens[k][1])
+            integrality[j] = 1
+            if section == "Binaries":
+                lb[j], ub[j] = 0, 1
+            k += 1
+        else:
+            raise ValueError(f"unexpected token {tokens[k][1].decode()}")
+
+    c = np.zeros(len(var_names), dtype=np_float)
+    np.add.at(
+        c,
+        np.frombuffer(obj_cols, dtype=np.int64),
+        np.frombuffer(obj_data, dtype=np_float),
+    )
+    return make_matrix(
+        rows,
+        cols,
+        data,
+        len(const_names),
+        row_lb,
+        row_ub,
+        var_names,
+        lb,
+        ub,
+        integrality,
+        c=c,
+        C=C,
+        sense=sense,
+        const_names=const_names,
+    )
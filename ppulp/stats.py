@@ -0,0 +1,178 @@
+import time
+
+
+class Span:
+    """wall time of one call of a phase
+
+    Attributes
+    ----------
+    name : str
+        name of phase
+    start : float
+        time.perf_counter() at the start
+    end : float
+        time.perf_counter() at the end
+    count : int
+        number of items (rows, variables, ...) processed in the call
+    """
+
+    __slots__ = ("name", "start", "end", "count")
+
+    def __init__(self, name, start=None, end=None, count=0):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.count = count
+
+    @property
+    def time(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Span({self.name!r}, time={self.time:.6f}, count={self.count})"
+
+
+class _Timer:
+    __slots__ = ("stats", "span")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.span = Span(name)
+
+    def __enter__(self):
+        self.span.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc):
+        self.span.end = time.perf_counter()
+        self.stats.add(self.span)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return _null_span  # count set to it is ignored
+
+    def __exit__(self, *exc):
+        return False
+
+
+_null_span = Span(None)
+_null_timer = _NullTimer()
+
+
+class Stats:
+    """wall time and counts of the phases of LpProblem
+
+    Nothing is recorded while it is disabled, and each phase costs only
+    one method call then.
+    The phases can be nested, for example "solve" includes "linearize",
+    "flopt_to_pulp", "write", "solver", "read_solution" and "decode".
+
+    .. code-block:: python
+
+        prob = LpProblem(stats=True)
+        ...
+        prob.stats.addCallback(lambda span: print(span.name, span.time))
+        prob.solve()
+        prob.stats.toDict()
+        >>> {'traverse': {'calls': 100, 'time': 0.0012, 'count': 100}, ...}
+
+    Parameters
+    ----------
+    enabled : bool
+    callbacks : None or list of function
+        each callback is called with Span when a call of a phase finishes
+
+    Attributes
+    ----------
+    phases : dict
+        phases[name] = [number of calls, total time, total count]
+    """
+
+    def __init__(self, enabled=False, callbacks=None):
+        self.enabled = enabled
+        self.callbacks = [] if callbacks is None else list(callbacks)
+        self.phases = {}
+
+    def span(self, name):
+        """context manager measuring a call of the phase
+
+        .. code-block:: python
+
+            with stats.span("linearize") as span:
+                ...
+                span.count = num_rows
+
+        Parameters
+        ----------
+        name : str
+
+        Returns
+        -------
+        context manager returning Span
+        """
+        if not self.enabled:
+            return _null_timer
+        return _Timer(self, name)
+
+    def record(self, name, start, end, count=0):
+        """record a call of the phase measured outside
+
+        Parameters
+        ----------
+        name : str
+        start : float
+        end : float
+            time.perf_counter() at the start and the end
+        count : int
+        """
+        if self.enabled:
+            self.add(Span(name, start, end, count))
+
+    def add(self, span):
+        phase = self.phases.get(span.name)
+        if phase is None:
+            phase = self.phases[span.name] = [0, 0.0, 0]
+        phase[0] += 1
+        phase[1] += span.time
+        phase[2] += span.count
+        for callback in self.callbacks:
+            callback(span)
+
+    def addCallback(self, callback):
+        """
+        Parameters
+        ----------
+        callback : function
+            called with Span when a call of a phase finishes
+        """
+        self.callbacks.append(callback)
+
+    def reset(self):
+        self.phases = {}
+
+    def toDict(self):
+        """
+        Returns
+        -------
+        dict
+            dict[name] = {"calls": int, "time": float, "count": int}
+        """
+        return {
+            name: {"calls": calls, "time": seconds, "count": count}
+            for name, (calls, seconds, count) in self.phases.items()
+        }
+
+    def show(self, to_str=False):
+        s = f"Stats\n"
+        for name, (calls, seconds, count) in self.phases.items():
+            s += f"  {name:<14}: {seconds:10.6f} sec, {calls} calls, count {count}\n"
+        if to_str:
+            return s
+        print(s)
+
+    def __repr__(self):
+        return f"Stats(enabled={self.enabled}, phases={list(self.phases)})"
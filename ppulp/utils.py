@@ -1,58 +1,72 @@
+import itertools
+import math
 import types
+import weakref
 
 import numpy as np
 import flopt
 from flopt import Variable, Sum, Dot, VarContinuous, VarBinary
-from flopt.constants import SolverTerminateState, array_classes
+from flopt.expression import Expression, Const, Prod
+from flopt.constraint import Constraint
+from flopt.constants import (
+    ConstraintType,
+    SolverTerminateState,
+    array_classes,
+    number_classes,
+)
 from flopt.env import create_variable_mode, is_create_variable_mode, get_variable_id
 
 
-def maxValue(exp):
+def maxValue(exp, tight=False):
     """Calculate max value of expression
 
     Parameters
     ----------
     exp : flopt.ExpresionElement or flopt.VarElement
+    tight : bool
+        if it is true, the expression is maximized by a solver,
+        otherwise the upper bound is propagated from the bounds of variables
 
     Returns
     -------
     float or str
-        maximum value of this expression can take
+        maximum value of this expression can take, inf if it is unbounded.
+        "Unbounded" or "Unknown" is returned by the solver in tight mode
     """
-    if exp.isLinear():
-        solver = flopt.Solver("ScipyMilpSearch")
-    elif exp.isQuadratic():
-        solver = flopt.Solver("CvxoptQpSearch")
-    return "Unknown"
-    prob = flopt.Problem(sense=flopt.Maximize)
-    prob += exp
-    status, logs = prob.solve(solver, msg=False)
-    if status == SolverTerminateState.Normal:
-        return prob.getObjectiveValue()
-    elif status == SolverTerminateState.Unbounded:
-        return "Unbounded"
-    return "Unknown"
+    if not tight:
+        return valueBounds(exp)[1]
+    return _solveValue(exp, flopt.Maximize)
 
 
-def minValue(exp):
-    """Calculate max value of expression
+def minValue(exp, tight=False):
+    """Calculate min value of expression
 
     Parameters
     ----------
     exp : flopt.ExpresionElement or flopt.VarElement
+    tight : bool
+        if it is true, the expression is minimized by a solver,
+        otherwise the lower bound is propagated from the bounds of variables
 
     Returns
     -------
     float or str
-        minimum value of this expression can take
+        minimum value of this expression can take, -inf if it is unbounded.
+        "Unbounded" or "Unknown" is returned by the solver in tight mode
     """
+    if not tight:
+        return valueBounds(exp)[0]
+    return _solveValue(exp, flopt.Minimize)
+
+
+def _solveValue(exp, sense):
     if exp.isLinear():
         solver = flopt.Solver("ScipyMilpSearch")
     elif exp.isQuadratic():
         solver = flopt.Solver("CvxoptQpSearch")
     else:
         return "Unknown"
-    prob = flopt.Problem(sense=flopt.Minimize)
+    prob = flopt.Problem(sense=sense)
     prob += exp
     status, logs = prob.solve(solver, msg=False)
     if status == SolverTerminateState.Normal:
@@ -62,17 +76,217 @@ def minValue(exp):
     return "Unknown"
 
 
+def valueBounds(exp, cache=True, bounds=None):
+    """interval of the values of expression propagated from the bounds of variables
+
+    The linear part is summed up per variable, and the bounds of products,
+    powers and absolute values are propagated by interval arithmetic
+    in O(number of terms). Auxiliary variables of And, Or, Xor, Abs and
+    PiecewiseLinear have their own bounds. The bounds of nonlinear nodes shared
+    in the expression are memoized during the call, nothing is kept after it,
+    so the result always follows the current bounds of variables.
+
+    .. code-block:: python
+
+        x = LpVariable("x", lowBound=-1, upBound=2)
+        y = LpVariable("y", lowBound=0, upBound=3)
+        valueBounds(2 * x - y + x * y)
+        >>> (-8.0, 10.0)
+
+    Parameters
+    ----------
+    exp : flopt.ExpresionElement, flopt.VarElement or number
+    cache : bool
+        if it is true, the bounds of each nonlinear node are computed once per call
+    bounds : None or dict
+        bounds[name] = (lb, ub) tightening the bounds of variables
+
+    Returns
+    -------
+    float, float
+        lower and upper bounds, -inf and inf for unbounded sides
+    """
+    return _value_bounds(exp, {} if cache else None, bounds)
+
+
+def _value_bounds(exp, memo, bounds):
+    terms = {}
+    lb = ub = 0.0
+    stack = [(exp, 1)]
+    while stack:
+        e, k = stack.pop()
+        if isinstance(e, flopt.variable.VarElement):
+            terms[e] = terms.get(e, 0) + k
+        elif isinstance(e, Const):
+            lb += k * e.value()
+            ub += k * e.value()
+        elif isinstance(e, number_classes):
+            lb += k * e
+            ub += k * e
+        elif isinstance(e, Expression) and e.operator in {"+", "-"}:
+            stack.append((e.elmB, k if e.operator == "+" else -k))
+            stack.append((e.elmA, k))
+        elif isinstance(e, Expression) and e.operator == "*" and _is_const(e.elmA):
+            stack.append((e.elmB, k * _const_value(e.elmA)))
+        elif isinstance(e, Expression) and e.operator == "*" and _is_const(e.elmB):
+            stack.append((e.elmA, k * _const_value(e.elmB)))
+        elif isinstance(e, Expression) and e.operator == "/" and _is_const(e.elmB):
+            stack.append((e.elmA, k / _const_value(e.elmB)))
+        elif isinstance(e, flopt.expression.Sum):
+            stack.extend((elm, k) for elm in e.elms)
+        else:
+            node_lb, node_ub = _scale_bounds(_node_bounds(e, memo, bounds), k)
+            lb += node_lb
+            ub += node_ub
+    for var, coeff in terms.items():
+        var_lb = -math.inf if var.getLb() is None else var.getLb()
+        var_ub = math.inf if var.getUb() is None else var.getUb()
+        if bounds is not None and var.name in bounds:
+            var_lb = max(var_lb, bounds[var.name][0])
+            var_ub = min(var_ub, bounds[var.name][1])
+        var_lb, var_ub = _scale_bounds((var_lb, var_ub), coeff)
+        lb += var_lb
+        ub += var_ub
+    return lb, ub
+
+
+def _is_const(e):
+    return isinstance(e, (Const, *number_classes))
+
+
+def _const_value(e):
+    return e.value() if isinstance(e, Const) else e
+
+
+def _scale_bounds(bounds, k):
+    if k == 0:
+        return 0.0, 0.0
+    lb, ub = bounds
+    return (k * lb, k * ub) if k > 0 else (k * ub, k * lb)
+
+
+def _mul_bounds(a, b):
+    # 0 * inf is 0, since the other side is bounded by 0
+    products = [0.0 if x == 0 or y == 0 else x * y for x, y in itertools.product(a, b)]
+    return min(products), max(products)
+
+
+def _pow_bounds(a, n):
+    lb, ub = a
+    if n % 2 == 1 or lb >= 0:
+        return lb**n, ub**n
+    if ub <= 0:
+        return ub**n, lb**n
+    return 0.0, max(lb**n, ub**n)
+
+
+def _node_bounds(e, memo, var_bounds=None):
+    # memo: id(node) -> bounds, living only during one valueBounds() call
+    if memo is not None and id(e) in memo:
+        return memo[id(e)]
+
+    unknown = (-math.inf, math.inf)
+    if isinstance(e, Expression) and e.operator == "*":
+        bounds = _mul_bounds(
+            _value_bounds(e.elmA, memo, var_bounds),
+            _value_bounds(e.elmB, memo, var_bounds),
+        )
+    elif isinstance(e, Expression) and e.operator == "/":
+        lb, ub = _value_bounds(e.elmB, memo, var_bounds)
+        if lb > 0 or ub < 0:
+            bounds = _mul_bounds(
+                _value_bounds(e.elmA, memo, var_bounds), (1 / ub, 1 / lb)
+            )
+        else:
+            bounds = unknown
+    elif (
+        isinstance(e, Expression)
+        and e.operator == "^"
+        and _is_const(e.elmB)
+        and float(_const_value(e.elmB)).is_integer()
+        and _const_value(e.elmB) >= 0
+    ):
+        bounds = _pow_bounds(
+            _value_bounds(e.elmA, memo, var_bounds), int(_const_value(e.elmB))
+        )
+    elif isinstance(e, Prod):
+        bounds = (1.0, 1.0)
+        for elm in e.elms:
+            bounds = _mul_bounds(bounds, _value_bounds(elm, memo, var_bounds))
+    elif isinstance(e, flopt.expression.Abs):
+        lb, ub = _value_bounds(e.elm, memo, var_bounds)
+        if lb >= 0:
+            bounds = (lb, ub)
+        elif ub <= 0:
+            bounds = (-ub, -lb)
+        else:
+            bounds = (0.0, max(-lb, ub))
+    else:
+        bounds = unknown
+
+    if memo is not None:
+        memo[id(e)] = bounds
+    return bounds
+
+
+def get_value(exp):
+    """
+    Returns
+    -------
+    float or None
+        value of expression, None if some variables in it have no value
+    """
+    try:
+        return exp.value()
+    except TypeError:
+        return None
+
+
+_creation_counter = itertools.count()
+
+
 class VarElementWithConsts:
     """VarElemet class has constrains
 
+    The problems where the constraints are added are recorded in the registry
+    of each problem (LpProblem._vars_with_consts), not in the variable,
+    so that the variable does not keep the problems alive.
+
     Attributes
     ----------
-    constrains : list of flopt.Constraint
-    add_consts_prob : set of LpProblem
+    constrains : list of Constraint
+    complete_function : None or function
+        function which sets the value computed from the values of the arguments
+    creation_order : int
+        the variables created later can depend on the variables created before
+    origin : None or str
+        name of the function which created the variable, such as "And",
+        which is used to break down the size of the problem
+    sos2 : list of (list of flopt.VarElement, list of float)
+        special ordered sets of type 2 passed to the solver with the weights
+    lp_forms : dict
+        constraints without binary variables used instead of constraints,
+        lp_forms[1] is exact when the problem only prefers smaller values of
+        the variable and lp_forms[-1] when it only prefers larger values.
+        The problem selects them from the usage of the variable.
+    constraints_function : None or function
+        returns the constraints from the current bounds of the arguments,
+        or None if they are unbounded. The problem calls it instead of
+        using constraints, and calls it again when a bound is relaxed
+    bounds_function : None or function
+        returns (lowBound, upBound) from the current bounds of the arguments,
+        which the problem sets to the variable before linearization
     """
 
+    def completeValue(self):
+        """set the value computed from the values of the arguments,
+        so that the constraints are satisfied
+        """
+        if self.complete_function is not None:
+            self.complete_function()
+
     def hasAddConsts(self, prob):
-        return prob in self.add_consts_prob
+        return prob._vars_with_consts.get(self.name) is self
 
     def addConstsTo(self, prob):
         """add constraints to problem
@@ -83,14 +297,23 @@ class VarElementWithConsts:
             problem
         """
         if not self.hasAddConsts(prob):
-            self.add_consts_prob.add(prob)
-            prob.addConstraints(self.constraints)
+            prob._vars_with_consts[self.name] = self
+            if self.lp_forms:
+                prob._undecided_vars.append(self)  # selected in linearization
+            else:
+                prob.addConstraints(self.constraints)
 
 
 class VarContinuousWithConsts(flopt.variable.VarContinuous, VarElementWithConsts):
     def __init__(self, name, *args, **kwargs):
         self.constraints = []
-        self.add_consts_prob = set()
+        self.constraints_function = None
+        self.bounds_function = None
+        self.complete_function = None
+        self.sos2 = []
+        self.lp_forms = {}
+        self.origin = None
+        self.creation_order = next(_creation_counter)
         if is_create_variable_mode():
             assert name is not None
             name = f"__{get_variable_id()}_" + name
@@ -100,122 +323,445 @@ class VarContinuousWithConsts(flopt.variable.VarContinuous, VarElementWithConsts
 class VarBinaryWithConsts(flopt.variable.VarBinary, VarElementWithConsts):
     def __init__(self, name, *args, **kwargs):
         self.constraints = []
-        self.add_consts_prob = set()
+        self.implication = None  # Implication of IfThen
+        self.complete_function = None
+        self.sos2 = []
+        self.lp_forms = {}
+        self.origin = None
+        self.creation_order = next(_creation_counter)
         if is_create_variable_mode():
             assert name is not None
             name = f"__{get_variable_id()}_" + name
         super().__init__(name, *args, **kwargs)
 
 
-def And(x, y):
-    """x & y
+# auxiliary variables keyed by operator and operand identities.
+# An entry dies with its variable, and a variable keeps its operands alive,
+# so the ids in a live key are never reused by other objects.
+_aux_variables = weakref.WeakValueDictionary()
+
+
+def cached_aux_variable(key, create):
+    """return the auxiliary variable created for key before, or create it
+
+    Parameters
+    ----------
+    key : tuple
+        operator name and ids of operands
+    create : function
+        returns new VarElementWithConsts
+
+    Returns
+    -------
+    VarElementWithConsts
+    """
+    var = _aux_variables.get(key)
+    if var is None:
+        var = create()
+        _aux_variables[key] = var
+    return var
+
+
+def binary_literals(xs):
+    """flatten the arguments of And, Or and Xor
+
+    Parameters
+    ----------
+    xs : tuple of flopt.VarBinary, list, numpy.ndarray or generator
+
+    Returns
+    -------
+    list of flopt.VarBinary
+    """
+    literals = []
+    for x in xs:
+        if isinstance(x, flopt.variable.VarElement):
+            literals.append(x)
+        else:
+            literals += binary_literals(x)
+    return literals
+
+
+def And(*xs):
+    """x_1 & x_2 & ... & x_k
+
+    One auxiliary variable z is created with the constraints
+    z <= x_i for all i and z >= sum(x) - (k-1).
+    The same variable is returned for the same literals in any order.
+
+    .. code-block:: python
+
+        x = LpVariable.array("x", 10, cat="Binary")
+        And(x[0], x[1])
+        And(x)  # all elements of the array
+        And(x[i] for i in range(0, 10, 2))
 
     Parameters
     ----------
-    x : flopt.VarBinary
-    y : flopt.VarBinary
+    xs : flopt.VarBinary, or arrays or generators of flopt.VarBinary
 
     Returns
     -------
     VarBinaryWithConsts
     """
-    assert isinstance(x, flopt.variable.VarBinary) and isinstance(
-        y, flopt.variable.VarBinary
-    )
+    xs = binary_literals(xs)
+    assert len(xs) > 0
+    assert all(isinstance(x, flopt.variable.VarBinary) for x in xs)
+    key = ("and", *sorted(id(x) for x in xs))
+    return cached_aux_variable(key, lambda: _and(xs))
+
 
+def _and(xs):
     with create_variable_mode():
         z = VarBinaryWithConsts("and")
+    z.origin = "And"
 
-    z.constraints = [
-        x + y - 1 <= z,
-        x >= z,
-        y >= z,
-    ]
+    z.constraints = [Sum(xs) - (len(xs) - 1) <= z]
+    z.constraints += [x >= z for x in xs]
+
+    def complete():
+        values = [get_value(x) for x in xs]
+        if all(value is not None for value in values):
+            z.setValue(min(values))
+
+    z.complete_function = complete
 
     return z
 
 
-def Or(x, y):
-    """x | y
+def Or(*xs):
+    """x_1 | x_2 | ... | x_k
+
+    One auxiliary variable z is created with the constraints
+    z >= x_i for all i and z <= sum(x).
+    The same variable is returned for the same literals in any order.
 
     Parameters
     ----------
-    x : flopt.VarBinary
-    y : flopt.VarBinary
+    xs : flopt.VarBinary, or arrays or generators of flopt.VarBinary
 
     Returns
     -------
     VarBinaryWithConsts
     """
-    assert isinstance(x, flopt.variable.VarBinary) and isinstance(
-        y, flopt.variable.VarBinary
-    )
+    xs = binary_literals(xs)
+    assert len(xs) > 0
+    assert all(isinstance(x, flopt.variable.VarBinary) for x in xs)
+    key = ("or", *sorted(id(x) for x in xs))
+    return cached_aux_variable(key, lambda: _or(xs))
 
+
+def _or(xs):
     with create_variable_mode():
         z = VarBinaryWithConsts("or")
+    z.origin = "Or"
+
+    z.constraints = [Sum(xs) >= z]
+    z.constraints += [x <= z for x in xs]
+
+    def complete():
+        values = [get_value(x) for x in xs]
+        if all(value is not None for value in values):
+            z.setValue(max(values))
 
-    z.constraints = [
-        x + y >= z,
-        x <= z,
-        y <= z,
-    ]
+    z.complete_function = complete
 
     return z
 
 
-def Xor(x, y):
-    """x ^ y
+def Xor(*xs):
+    """x_1 ^ x_2 ^ ... ^ x_k
+
+    For two literals, z is defined by the four constraints of the convex hull.
+    For more literals, the parity is encoded by one row sum(x) == z + 2 m
+    with an integer variable m in [0, k // 2].
+    The same variable is returned for the same literals in any order.
 
     Parameters
     ----------
-    x : flopt.VarBinary
-    y : flopt.VarBinary
+    xs : flopt.VarBinary, or arrays or generators of flopt.VarBinary
 
     Returns
     -------
     VarBinaryWithConsts
     """
-    assert isinstance(x, flopt.variable.VarBinary) and isinstance(
-        y, flopt.variable.VarBinary
-    )
+    xs = binary_literals(xs)
+    assert len(xs) > 0
+    assert all(isinstance(x, flopt.variable.VarBinary) for x in xs)
+    key = ("xor", *sorted(id(x) for x in xs))
+    return cached_aux_variable(key, lambda: _xor(xs))
+
 
+def _xor(xs):
     with create_variable_mode():
         z = VarBinaryWithConsts("xor")
+    z.origin = "Xor"
+
+    if len(xs) == 2:
+        x, y = xs
+        z.constraints = [
+            x + y >= z,
+            x - y <= z,
+            -x + y <= z,
+            x + y - 2 <= -z,
+        ]
+        m = None
+    else:
+        with create_variable_mode():
+            m = Variable("xor_m", lowBound=0, upBound=len(xs) // 2, cat="Integer")
+        z.constraints = [Sum(xs) == z + 2 * m]
 
-    z.constraints = [
-        x + y >= z,
-        x - y <= z,
-        -x + y <= z,
-        x + y - 2 <= -z,
-    ]
+    def complete():
+        values = [get_value(x) for x in xs]
+        if all(value is not None for value in values):
+            num_true = int(round(sum(values)))
+            z.setValue(num_true % 2)
+            if m is not None:
+                m.setValue(num_true // 2)
+
+    z.complete_function = complete
 
     return z
 
 
+def IfThen(cond, then, epsilon=1e-5):
+    """if cond is satisfied, then must be satisfied
+
+    cond implies z = 1 by big-M rows with the bounds of cond, and z = 1
+    implies then by big-M rows with the bounds of then, where z is a binary
+    indicator. The big-M values are computed from the bounds of variables
+    propagated through the expressions in linearization of the problem,
+    tightened by the bounds propagated by the other constraints,
+    and computed again when a bound is relaxed.
+
+    .. code-block:: python
+
+        x = LpVariable("x", lowBound=0, upBound=10)
+        y = LpVariable("y", lowBound=-5, upBound=5)
+        prob += IfThen(x <= 3, y >= 0)
+
+    Parameters
+    ----------
+    cond : Constraint
+    then : Constraint
+    epsilon : float
+        cond is regarded as violated by the margin epsilon
+
+    Returns
+    -------
+    list of Constraint
+    """
+    with create_variable_mode():
+        z = VarBinaryWithConsts("ifthen")
+    z.origin = "IfThen"
+    z.implication = Implication(cond, then, z, epsilon)
+    return list(z.implication.constraints)
+
+
+class ImplicationRows(list):
+    """rows of flopt's (cond) >> (then), which LpProblem replaces
+    with IfThen(cond, then) when they are added
+
+    Parameters
+    ----------
+    rows : list of Constraint
+        rows created by flopt
+    cond : Constraint
+    then : Constraint
+    """
+
+    def __init__(self, rows, cond, then):
+        super().__init__(rows)
+        self.cond = cond
+        self.then = then
+
+
+class Implication:
+    """big-M rows of IfThen(cond, then)
+
+    Parameters
+    ----------
+    cond : Constraint
+    then : Constraint
+    indicator : VarBinaryWithConsts
+        z, where cond implies z = 1 and z = 1 implies then
+    epsilon : float
+
+    Attributes
+    ----------
+    constraints : list of Constraint
+        big-M rows with the bounds of variables when this is created,
+        a problem replaces them with its own rows by tightenedRows()
+        built from the bounds in linearization
+    num_cond_rows : int
+        number of the rows for cond at the head of the rows
+    indicator_rows : list of Constraint
+        rows which are then when z = 1, they can be passed to the solver
+        as indicator constraints
+    big_m : dict
+        big_m[name of row] = big-M value
+    """
+
+    def __init__(self, cond, then, indicator, epsilon=1e-5):
+        assert isinstance(cond, Constraint) and isinstance(then, Constraint)
+        self.cond = cond
+        self.then = then
+        self.indicator = indicator
+        self.epsilon = epsilon
+        self.sigma = None  # which side cond of equality is violated
+        if cond.type() == ConstraintType.Eq:
+            with create_variable_mode():
+                self.sigma = Variable("ifthen_s", cat=VarBinary)
+        self.constraints, self.big_m = self._rows()
+        self.num_cond_rows = 1 if self.sigma is None else 2
+        self.indicator_rows = self.constraints[self.num_cond_rows :]
+        indicator.complete_function = self._complete
+
+    def _rows(self, bounds=None):
+        """
+        Returns
+        -------
+        list of Constraint, dict
+            rows and big-M values
+        """
+        a, b = self.cond.expression, self.then.expression
+        z, s, eps = self.indicator, self.sigma, self.epsilon
+        a_lb, a_ub = valueBounds(a, bounds=bounds)
+        b_lb, b_ub = valueBounds(b, bounds=bounds)
+
+        assert a_lb > -math.inf, f"{a.getName()} is unbounded below in {self.cond}"
+        if s is None:
+            # a > 0 if z = 0
+            big_m = [eps - a_lb]
+            rows = [a >= eps - big_m[0] * z]
+        else:
+            # a > 0 if z = 0 and s = 1, a < 0 if z = 0 and s = 0
+            assert a_ub < math.inf, f"{a.getName()} is unbounded above in {self.cond}"
+            big_m = [eps - a_lb, a_ub + eps]
+            rows = [
+                a >= eps - big_m[0] * (z + 1 - s),
+                a <= -eps + big_m[1] * (z + s),
+            ]
+        assert b_ub < math.inf, f"{b.getName()} is unbounded above in {self.then}"
+        big_m.append(b_ub)
+        rows.append(b <= b_ub * (1 - z))
+        if self.then.type() == ConstraintType.Eq:
+            assert b_lb > -math.inf, f"{b.getName()} is unbounded below in {self.then}"
+            big_m.append(-b_lb)
+            rows.append(b >= b_lb * (1 - z))
+
+        for i, const in enumerate(rows, 1):
+            const.name = f"for_{z.name}_{i}"
+        return rows, {const.name: m for const, m in zip(rows, big_m)}
+
+    def tightenedRows(self, bounds):
+        """big-M rows with the current bounds of variables tightened by bounds,
+        the rows of this are not modified
+
+        Parameters
+        ----------
+        bounds : dict
+            bounds[name] = (lb, ub) of variables propagated by the constraints
+
+        Returns
+        -------
+        None or (list of Constraint, dict)
+            None if no big-M value is changed, otherwise rows and big-M values
+        """
+        rows, big_m = self._rows(bounds)
+        if big_m == self.big_m:
+            return None
+        return rows, big_m
+
+    def variables(self):
+        """
+        Returns
+        -------
+        list of VarElement
+            variables of cond and then
+        """
+        variables = {}
+        for exp in (self.cond.expression, self.then.expression):
+            for var in exp.getVariables():
+                variables[var.name] = var
+        return list(variables.values())
+
+    def _complete(self):
+        a_value, b_value = get_value(self.cond.expression), get_value(
+            self.then.expression
+        )
+        if a_value is None or b_value is None:
+            return
+        if self.sigma is None:
+            satisfied = a_value < self.epsilon
+        else:
+            satisfied = abs(a_value) < self.epsilon
+            self.sigma.setValue(int(a_value >= self.epsilon))
+        if self.then.type() == ConstraintType.Eq:
+            then_satisfied = abs(b_value) <= 1e-9
+        else:
+            then_satisfied = b_value <= 1e-9
+        self.indicator.setValue(int(satisfied or then_satisfied))
+
+
 def Abs(x):
-    """Absolute variable
+    """Absolute variable, the same variable is returned for the same x
+
+    y >= x and y >= -x are used where the problem only prefers smaller y.
+    Otherwise y is split by a binary variable b with big-M from the bounds
+    of x, y <= x + 2 |lb| (1 - b) and y <= -x + 2 ub b,
+    which needs the finite bounds of x. The big-M values and the upper bound
+    of y are computed from the bounds of x when the problem is linearized,
+    and computed again when a bound is relaxed.
 
     Parameters
     ----------
-    x : flopt.VarElement
+    x : flopt.VarElement or flopt.ExpressionElement
 
     Returns
     -------
-    VarBinaryWithConsts
+    VarContinuousWithConsts
     """
+    return cached_aux_variable(("abs", id(x)), lambda: _abs(x))
 
+
+def _abs(x):
     with create_variable_mode():
-        y = VarContinuousWithConsts(
-            "abs",
-            lowBound=0,
-            upBound=None,
-            ini_value=abs(x.value()),
-        )
+        y = VarContinuousWithConsts("abs", lowBound=0, ini_value=abs(x.value()))
+        b = Variable("abs_b", cat=VarBinary)  # b = 1 if x >= 0
+    y.origin = "Abs"
+    y.lp_forms = {1: [y >= x, y >= -x]}
+    y.constraints = None
+
+    def bounds():
+        lb, ub = valueBounds(x)
+        return 0, max(-lb, ub) if max(-lb, ub) < math.inf else None
+
+    def constraints():
+        lb, ub = valueBounds(x)
+        if lb >= 0:
+            return [y == x]
+        elif ub <= 0:
+            return [y == -x]
+        elif max(-lb, ub) < math.inf:
+            return [
+                y >= x,
+                y >= -x,
+                y <= x + 2 * -lb * (1 - b),
+                y <= -x + 2 * ub * b,
+            ]
+        return None  # only LP form is available
+
+    y.bounds_function = bounds
+    y.constraints_function = constraints
+    y.lowBound, y.upBound = bounds()
+
+    def complete():
+        if get_value(x) is not None:
+            y.setValue(abs(x.value()))
+            b.setValue(int(x.value() >= 0))
 
-    y.constraints = [
-        y >= x,
-        y >= -x,
-    ]
+    y.complete_function = complete
 
     return y
 
@@ -237,33 +783,195 @@ class PiecewiseLinear:
 
         prob += f(x + y)
         prob += f(x) >= 10
+        prob += f(x) <= 20  # the same variable as f(x) above
+
+        g = PiecewiseLinear(math.sqrt, xl=0, xu=100, num=129, method="log")
+        prob += g(x) <= 5  # 7 binary variables for 128 segments
 
     Parameters
     ----------
     f : function
-        python function return the value
+        python function return the value, or numpy.ufunc which is evaluated
+        on all the breakpoints at once
     xl : float
         lower bound of domain
     xu : float
         upper bound of domain
     num : int
-        number of samples
+        number of samples, not used when abs_tol or rel_tol is given
+    method : str
+        encoding of the segment selection
+
+        - "binary": one binary variable per segment
+        - "log": ceil(log2(num-1)) binary variables assigned by Gray code
+        - "incremental": filling the segments in order, num-2 binary variables
+        - "sos2": special ordered set of type 2 passed to the solver,
+          which solve() and writeLP() support but the matrix form does not
+        - "auto": "binary", or the tangent cuts without binary variables when
+          f is convex (concave) on the samples and f(x) is only minimized
+          (maximized) in the problem
+    abs_tol, rel_tol : None or float
+        if one of them is given, the breakpoints are placed adaptively by
+        splitting the segment of the largest excess error until
+        | f(x) - approximation | <= abs_tol + rel_tol * | f(x) | holds
+        on the dense samples
+    samples : int
+        number of dense samples where the error is measured
+
+    .. code-block:: python
+
+        f = PiecewiseLinear(np.exp, xl=0, xu=5, abs_tol=0.1)
+        len(f.breakpoints()[0]), f.error()
+        >>> 37 0.0957...
     """
 
-    def __init__(self, f, xl, xu, num=10):
+    methods = ("auto", "binary", "log", "incremental", "sos2")
+
+    def __init__(
+        self,
+        f,
+        xl,
+        xu,
+        num=10,
+        method="auto",
+        abs_tol=None,
+        rel_tol=None,
+        samples=1001,
+    ):
+        assert method in self.methods, f"method must be one of {self.methods}"
         self.f = f
         self.xl = xl
         self.xu = xu
         self.num = num
+        self.method = method
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+        self.samples = samples
+        self._breakpoints = None
+
+    def breakpoints(self):
+        """breakpoints sampled once and shared by all the call sites
+
+        Returns
+        -------
+        numpy.ndarray, numpy.ndarray
+            x and f(x) of breakpoints
+        """
+        key = self._breakpointsKey()
+        if self._breakpoints is None or self._breakpoints[0] != key:
+            if self.abs_tol is None and self.rel_tol is None:
+                x_points = np.linspace(self.xl, self.xu, self.num)
+                y_points = self._evaluate(x_points)
+            else:
+                x_points, y_points = self._adaptiveBreakpoints()
+            self._breakpoints = (key, x_points, y_points)
+        return self._breakpoints[1:]
+
+    def _breakpointsKey(self):
+        return (
+            self.f,
+            self.xl,
+            self.xu,
+            self.num,
+            self.abs_tol,
+            self.rel_tol,
+            self.samples,
+        )
+
+    def _evaluate(self, x_points):
+        if isinstance(self.f, np.ufunc):
+            return self.f(x_points)
+        return np.array([self.f(xi) for xi in x_points.tolist()], dtype=np.float64)
+
+    def _adaptiveBreakpoints(self):
+        xs = np.linspace(self.xl, self.xu, self.samples)
+        fs = self._evaluate(xs)
+        tol = (self.abs_tol or 0) + (self.rel_tol or 0) * np.abs(fs)
+
+        def split(lo, hi):
+            # the sample where the excess error is largest in segment [lo, hi]
+            if hi - lo < 2:
+                return None
+            ratio = (xs[lo + 1 : hi] - xs[lo]) / (xs[hi] - xs[lo])
+            approx = fs[lo] + ratio * (fs[hi] - fs[lo])
+            excess = np.abs(fs[lo + 1 : hi] - approx) - tol[lo + 1 : hi]
+            j = int(np.argmax(excess))
+            return lo + 1 + j if excess[j] > 0 else None
+
+        indices = [0, self.samples - 1]
+        segments = [(0, self.samples - 1)]
+        while segments:
+            lo, hi = segments.pop()
+            mid = split(lo, hi)
+            if mid is not None:
+                indices.append(mid)
+                segments += [(lo, mid), (mid, hi)]
+        indices.sort()
+        return xs[indices], fs[indices]
+
+    def error(self, relative=False):
+        """maximum error of the approximation measured on the dense samples
+
+        Parameters
+        ----------
+        relative : bool
+            if it is true, the error is divided by | f(x) |
+
+        Returns
+        -------
+        float
+        """
+        x_points, y_points = self.breakpoints()
+        xs = np.union1d(np.linspace(self.xl, self.xu, self.samples), x_points)
+        fs = self._evaluate(xs)
+        error = np.abs(fs - np.interp(xs, x_points, y_points))
+        if relative:
+            nonzero = fs != 0
+            error = error[nonzero] / np.abs(fs[nonzero])
+        return float(error.max(initial=0))
 
     def __call__(self, x):
+        # a new variable is created when the breakpoints are changed
+        key = (id(self), self.method, id(x), self._breakpointsKey())
+        return cached_aux_variable(key, lambda: self._create(x))
+
+    @staticmethod
+    def _segment(x_points, x_value):
+        """
+        Parameters
+        ----------
+        x_points : numpy.ndarray
+            x of the breakpoints of the variable
+        x_value : float
+
+        Returns
+        -------
+        int, float
+            segment k between x_points[k] and x_points[k+1] including x_value,
+            and the ratio of x_value in the segment
+        """
+        x_value = min(max(x_value, x_points[0]), x_points[-1])
+        k = min(np.searchsorted(x_points, x_value, side="right") - 1, len(x_points) - 2)
+        ratio = (x_value - x_points[k]) / (x_points[k + 1] - x_points[k])
+        return k, ratio
+
+    def _create(self, x):
         name = "PL"
-        n = self.num
-        x_points = np.linspace(self.xl, self.xu, n)
-        y_points = [self.f(xi) for xi in x_points]
+        x_points, y_points = self.breakpoints()
+        n = len(x_points)
+
+        with create_variable_mode():
+            y = VarContinuousWithConsts(
+                f"y_{name}",
+                lowBound=float(y_points.min()),
+                upBound=float(y_points.max()),
+            )
+        y.origin = "PiecewiseLinear"
+
+        if self.method == "incremental":
+            return self._incremental(x, y, name)
 
         with create_variable_mode():
-            y = VarContinuousWithConsts(f"y_{name}")
             t = Variable.array(f"t_{name}", n, lowBound=0)
 
         y.constraints = [
@@ -272,13 +980,115 @@ class PiecewiseLinear:
             Sum(t) == 1,
         ]
 
-        # SOS2
+        binaries = []
+        if self.method in {"auto", "binary"}:
+            with create_variable_mode():
+                z = Variable.array(f"z_{name}", n - 1, cat=VarBinary)
+            binaries = list(z)
+
+            y.constraints += [Sum(z) == 1]
+            y.constraints += [t[0] <= z[0]]
+            y.constraints += [t[i] <= z[i - 1] + z[i] for i in range(1, n - 1)]
+            y.constraints += [t[n - 1] <= z[n - 2]]
+
+            def codes(k):
+                return [int(i == k) for i in range(n - 1)]
+
+        elif self.method == "log":
+            # the segments are numbered by Gray code, so that the adjacent
+            # segments differ in one bit
+            num_bits = math.ceil(math.log2(n - 1)) if n > 2 else 0
+            with create_variable_mode():
+                b = Variable.array(f"b_{name}", num_bits, cat=VarBinary)
+            binaries = list(b)
+
+            def codes(k):
+                gray = k ^ (k >> 1)
+                return [(gray >> l) & 1 for l in range(num_bits)]
+
+            segment_codes = [codes(k) for k in range(n - 1)]
+            for l in range(num_bits):
+                ones, zeros = [], []
+                for i in range(n):
+                    bits = {segment_codes[k][l] for k in (i - 1, i) if 0 <= k < n - 1}
+                    if bits == {1}:
+                        ones.append(t[i])
+                    elif bits == {0}:
+                        zeros.append(t[i])
+                if ones:
+                    y.constraints.append(Sum(ones) <= b[l])
+                if zeros:
+                    y.constraints.append(Sum(zeros) <= 1 - b[l])
+
+        else:  # self.method == "sos2"
+            y.sos2 = [(list(t), list(range(1, n + 1)))]
+
+            def codes(k):
+                return []
+
+        def complete():
+            x_value = get_value(x)
+            if x_value is None:
+                return
+            k, ratio = self._segment(x_points, x_value)
+            for i in range(n):
+                t[i].setValue(0)
+            t[k].setValue(1 - ratio)
+            t[k + 1].setValue(ratio)
+            for var, code in zip(binaries, codes(k)):
+                var.setValue(code)
+            y.setValue((1 - ratio) * y_points[k] + ratio * y_points[k + 1])
+
+        y.complete_function = complete
+        if self.method == "auto":
+            y.lp_forms = self._lpForms(x, y)
+
+        return y
+
+    def _lpForms(self, x, y):
+        x_points, y_points = self.breakpoints()
+        slopes = np.diff(y_points) / np.diff(x_points)
+        eps = 1e-9 * max(1, np.abs(slopes).max())
+        domain = [x >= float(x_points[0]), x <= float(x_points[-1])]
+        lines = [
+            (float(slope), float(yk - slope * xk))
+            for slope, xk, yk in zip(slopes, x_points, y_points)
+        ]
+        lp_forms = {}
+        if np.all(np.diff(slopes) >= -eps):  # convex
+            lp_forms[1] = [y >= a * x + b for a, b in lines] + domain
+        if np.all(np.diff(slopes) <= eps):  # concave
+            lp_forms[-1] = [y <= a * x + b for a, b in lines] + domain
+        return lp_forms
+
+    def _incremental(self, x, y, name):
+        # x = x_0 + sum_k d_k (x_{k+1} - x_k), where the segment k is filled
+        # (d_k = 1) before the segment k+1 is used (d_{k+1} > 0)
+        x_points, y_points = self.breakpoints()
+        n = len(x_points)
+
         with create_variable_mode():
-            z = Variable.array(f"z_{name}", n - 1, cat=VarBinary)
+            d = Variable.array(f"d_{name}", n - 1, lowBound=0, upBound=1)
+            w = Variable.array(f"w_{name}", n - 2, cat=VarBinary)
+
+        y.constraints = [
+            x == float(x_points[0]) + Dot(d, np.diff(x_points)),
+            y == float(y_points[0]) + Dot(d, np.diff(y_points)),
+        ]
+        y.constraints += [d[k + 1] <= w[k] for k in range(n - 2)]
+        y.constraints += [w[k] <= d[k] for k in range(n - 2)]
+
+        def complete():
+            x_value = get_value(x)
+            if x_value is None:
+                return
+            k, ratio = self._segment(x_points, x_value)
+            for i in range(n - 1):
+                d[i].setValue(1 if i < k else ratio if i == k else 0)
+            for i in range(n - 2):
+                w[i].setValue(int(i < k))
+            y.setValue((1 - ratio) * y_points[k] + ratio * y_points[k + 1])
 
-        y.constraints += [Sum(z) == 1]
-        y.constraints += [t[0] <= z[0]]
-        y.constraints += [t[i] <= z[i - 1] + z[i] for i in range(1, n - 2)]
-        y.constraints += [t[n - 1] <= z[n - 2]]
+        y.complete_function = complete
 
         return y
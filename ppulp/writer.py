@@ -0,0 +1,491 @@
+import gzip
+
+import numpy as np
+
+from flopt.constants import VariableType, ConstraintType
+
+from ppulp.matrix import linear_terms
+
+LINE_SIZE = 255
+_illegal_chars = str.maketrans("-+[] ->/", "________")
+
+
+def to_name(name):
+    """replace the characters which LP and MPS format do not accept"""
+    return str(name).translate(_illegal_chars)
+
+
+def open_file(filename, compress=None, buffer_size=1 << 20):
+    """open the file to write
+
+    Parameters
+    ----------
+    filename : str or path-like
+    compress : None or bool
+        if it is true, the file is written with gzip.
+        if it is None, gzip is used when filename ends with ".gz"
+    buffer_size : int
+    """
+    filename = str(filename)
+    if compress is None:
+        compress = filename.endswith(".gz")
+    if compress:
+        return gzip.open(filename, "wt", compresslevel=6)
+    return open(filename, "w", buffering=buffer_size)
+
+
+class ChunkWriter:
+    """buffer lines and write them to file per chunk
+
+    Parameters
+    ----------
+    f : file object
+    chunk_size : int
+        number of lines written at once
+    """
+
+    def __init__(self, f, chunk_size=10000):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+        if len(self.lines) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.f.write("".join(self.lines))
+        self.lines = []
+
+
+def lp_expression(name, terms, max_length=LINE_SIZE):
+    """
+    Parameters
+    ----------
+    name : str
+    terms : iterable of (str, float)
+        pairs of the variable name and the coefficient
+    max_length : int
+        maximum length of lines
+
+    Returns
+    -------
+    str
+        expression in LP format without new line,
+        "0 x" is written when all the coefficients are zero,
+        and "0 __dummy" when there is no term
+    """
+    line = f"{name}:"
+    lines = []
+    zero_name = "__dummy"
+    for var_name, coeff in terms:
+        if coeff == 0:
+            zero_name = var_name
+            continue
+        if coeff < 0:
+            sign, coeff = " -", -coeff
+        elif lines or len(line) > len(name) + 1:
+            sign = " +"
+        else:
+            sign = ""
+        if coeff == 1:
+            term = f"{sign} {var_name}"
+        else:
+            term = f"{sign} {coeff + 0:.12g} {var_name}"
+        if len(line) + len(term) > max_length:
+            lines.append(line)
+            line = term
+        else:
+            line += term
+    if not lines and len(line) == len(name) + 1:
+        line += f" 0 {zero_name}"
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def lp_bound(name, lb, ub, integer):
+    """
+    Returns
+    -------
+    str or None
+        bound line in LP format, None if default bound (0 <= x)
+    """
+    if lb is None and ub is None:
+        return f" {name} free\n"
+    if lb is not None and lb == ub:
+        return f" {name} = {lb:.12g}\n"
+    if lb is None:
+        s = "-inf <= "
+    elif lb == 0 and not integer:
+        s = ""
+    else:
+        s = f"{lb:.12g} <= "
+    if ub is None:
+        if not s:
+            return None
+        return f" {s}{name}\n"
+    return f" {s}{name} <= {ub:.12g}\n"
+
+
+def write_lp(
+    prob,
+    filename,
+    mip=True,
+    chunk_size=10000,
+    compress=None,
+    indicators=False,
+    write_sos=True,
+    max_length=LINE_SIZE,
+):
+    """write linearized problem in LP format
+
+    Rows are formatted from the flopt expressions one by one
+    and written per chunk, the pulp model is not created.
+
+    Parameters
+    ----------
+    prob : LpProblem
+        linearized problem
+    filename : str or path-like
+    mip : bool
+        if it is false, integer and binary variables are written as continuous
+    chunk_size : int
+        number of lines written at once
+    compress : None or bool
+        if it is true, the file is written with gzip.
+        if it is None, gzip is used when filename ends with ".gz"
+    indicators : bool
+        if it is true, the rows of prob.getIndicators() are written as
+        indicator constraints "z = 1 -> row" instead of big-M rows
+    write_sos : bool
+        if it is false, SOS section is not written
+    max_length : int
+        maximum length of the lines of expressions
+    """
+    variables = {}
+    indicator_vars = {}  # id(row) -> indicator variable
+    if indicators:
+        indicator_vars = {id(row): var for var, row in prob.getIndicators()}
+
+    def names(terms):
+        for var, coeff in terms.items():
+            name = to_name(var.name)
+            if name not in variables:
+                variables[name] = var
+            yield name, coeff
+
+    with open_file(filename, compress) as f:
+        writer = ChunkWriter(f, chunk_size)
+        name = "NoName" if prob.name is None else to_name(prob.name)
+        writer.write(f"\\* {name} *\\\n")
+        if prob.sense.lower() == "maximize":
+            writer.write("Maximize\n")
+        else:
+            writer.write("Minimize\n")
+
+        terms, constant = linear_terms(prob.obj)
+        obj_name = "OBJ" if prob.obj_name is None else to_name(prob.obj_name)
+        dummy = not any(coeff != 0 for coeff in terms.values())
+        if dummy:
+            writer.write(f"{obj_name}: __dummy\n")
+        else:
+            writer.write(lp_expression(obj_name, names(terms), max_length) + "\n")
+
+        writer.write("Subject To\n")
+        num_unnamed = 0
+        for const in prob.getConstraints():
+            terms, constant = linear_terms(const.expression)
+            indicator = indicator_vars.get(id(const))
+            if indicator is not None:
+                # substitute z = 1 into the big-M row
+                constant += terms.pop(indicator, 0)
+            if not terms:
+                if constant <= 1e-9 and (
+                    const.type() == ConstraintType.Le or constant >= -1e-9
+                ):
+                    continue  # satisfied
+                dummy = True  # violated row is written with 0 __dummy
+            if const.name is None:
+                num_unnamed += 1
+                const_name = f"_C{num_unnamed}"
+            else:
+                const_name = to_name(const.name)
+            if const.type() == ConstraintType.Eq:
+                sense = "="
+            else:  # const.type() == ConstraintType.Le
+                sense = "<="
+            rhs = -constant + 0
+            line = lp_expression(const_name, names(terms), max_length)
+            if indicator is not None:
+                name = to_name(indicator.name)
+                variables[name] = indicator
+                line = f"{const_name}: {name} = 1 ->{line[len(const_name) + 1:]}"
+            writer.write(f"{line} {sense} {rhs:.12g}\n")
+
+        # rows kept in the sparse matrix form
+        block = getattr(prob, "lp_matrix", None)
+        if block is not None:
+            var_names = [to_name(var.name) for var in block.x]
+            variables.update(zip(var_names, block.x))
+            A = block.A.tocsr()
+            for i, (lb, ub, const_name) in enumerate(
+                zip(block.row_lb.tolist(), block.row_ub.tolist(), block.const_names)
+            ):
+                start, end = A.indptr[i], A.indptr[i + 1]
+                if start == end:
+                    if lb <= 1e-9 and ub >= -1e-9:
+                        continue  # satisfied
+                    dummy = True
+                terms = [
+                    (var_names[j], coeff)
+                    for j, coeff in zip(
+                        A.indices[start:end].tolist(), A.data[start:end].tolist()
+                    )
+                ]
+                if const_name is None:
+                    num_unnamed += 1
+                    const_name = f"_C{num_unnamed}"
+                else:
+                    const_name = to_name(const_name)
+                if lb == ub:
+                    rows = [("=", lb, const_name)]
+                else:
+                    rows = []
+                    if ub != np.inf:
+                        rows.append(("<=", ub, const_name))
+                    if lb != -np.inf:
+                        name = f"{const_name}_lb" if rows else const_name
+                        rows.append((">=", lb, name))
+                for sense, rhs, name in rows:
+                    line = lp_expression(name, terms, max_length)
+                    writer.write(f"{line} {sense} {rhs:.12g}\n")
+
+        writer.write("Bounds\n")
+        if dummy:
+            writer.write(" __dummy = 0\n")
+        generals = []
+        binaries = []
+        for name, var in variables.items():
+            if mip and var.type() == VariableType.Binary:
+                binaries.append(name)
+                continue
+            integer = mip and var.type() == VariableType.Integer
+            if integer:
+                generals.append(name)
+            lb, ub = var.getLb(), var.getUb()
+            if var.type() == VariableType.Binary:
+                lb, ub = 0, 1
+            line = lp_bound(name, lb, ub, integer)
+            if line is not None:
+                writer.write(line)
+        if generals:
+            writer.write("Generals\n")
+            for name in generals:
+                writer.write(f"{name}\n")
+        if binaries:
+            writer.write("Binaries\n")
+            for name in binaries:
+                writer.write(f"{name}\n")
+        sos2 = prob.getSOS2() if write_sos and hasattr(prob, "getSOS2") else {}
+        if sos2:
+            writer.write("SOS\n")
+            for sos in sos2.values():
+                writer.write("S2:: \n")
+                for var, weight in sos:
+                    writer.write(f" {to_name(var.name)}: {weight:.12g}\n")
+        writer.write("End\n")
+        writer.flush()
+
+
+def matrix_columns(A, block_size=1 << 20):
+    """iterate the columns of sparse matrix without its copy in CSC form
+
+    The entries of a block of columns having about block_size nonzeros
+    are gathered and sorted by the column at once,
+    so the memory used in addition to A is bounded by the block.
+
+    Parameters
+    ----------
+    A : scipy.sparse matrix
+    block_size : int
+
+    Yields
+    ------
+    list of int, list of float
+        row indices and values of each column
+    """
+    num_columns = A.shape[1]
+    if A.format == "csc":
+        for j in range(num_columns):
+            start, end = A.indptr[j], A.indptr[j + 1]
+            yield A.indices[start:end].tolist(), A.data[start:end].tolist()
+        return
+    A = A.tocsr()
+    counts = np.bincount(A.indices, minlength=num_columns)
+    starts = np.cumsum(counts) - counts  # number of nonzeros before each column
+    boundaries = np.unique(
+        np.concatenate(
+            [
+                np.searchsorted(starts, np.arange(0, A.nnz, block_size)),
+                [0, num_columns],
+            ]
+        )
+    ).tolist()
+    for j0, j1 in zip(boundaries[:-1], boundaries[1:]):
+        positions = np.flatnonzero((A.indices >= j0) & (A.indices < j1))
+        # positions are in the order of rows, which is kept by stable sort
+        order = np.argsort(A.indices[positions], kind="stable")
+        positions = positions[order]
+        rows = (np.searchsorted(A.indptr, positions, side="right") - 1).tolist()
+        values = A.data[positions].tolist()
+        offset = 0
+        for count in counts[j0:j1].tolist():
+            yield rows[offset : offset + count], values[offset : offset + count]
+            offset += count
+
+
+def write_mps(
+    matrix,
+    filename,
+    mip=True,
+    chunk_size=10000,
+    compress=None,
+    rename=False,
+    with_objsense=False,
+    sense=None,
+):
+    """write matrix form of problem in MPS format
+
+    MPS format lists coefficients column by column,
+    so the columns are taken from the matrix per block by matrix_columns()
+    and written per chunk.
+
+    Parameters
+    ----------
+    matrix : LpMatrix
+    filename : str or path-like
+    mip : bool
+        if it is false, integer variables are written as continuous
+    chunk_size : int
+        number of lines written at once
+    compress : None or bool
+        if it is true, the file is written with gzip.
+        if it is None, gzip is used when filename ends with ".gz"
+    rename : bool
+        if it is true, variables and constraints are named X0000000 and C0000000, ...
+    with_objsense : bool
+        if it is true, OBJSENSE section is written for maximize problem,
+        otherwise the sense is written in the comment line "*SENSE:Maximize"
+        as pulp does, which is read by read_mps() but ignored by solvers
+    sense : None or str
+        "Minimize" or "Maximize", the sense of the problem written.
+        If it is not the sense of matrix, the objective is negated.
+        If it is None, the sense of matrix is used
+
+    Notes
+    -----
+    The constant term of the objective is not written, same as the LP writer.
+    """
+    num_constraints = matrix.numConstraints()
+    num_variables = matrix.numVariables()
+    if rename:
+        var_names = [f"X{j:07d}" for j in range(num_variables)]
+        const_names = [f"C{i:07d}" for i in range(num_constraints)]
+    else:
+        var_names = [to_name(name) for name in matrix.var_names]
+        const_names = []
+        num_unnamed = 0
+        for name in matrix.const_names:
+            if name is None:
+                num_unnamed += 1
+                name = f"_C{num_unnamed}"
+            const_names.append(to_name(name))
+
+    c = matrix.c
+    if sense is not None and sense != matrix.sense:
+        c = -c
+    else:
+        sense = matrix.sense
+    maximize = sense == "Maximize"
+
+    row_lb, row_ub = matrix.row_lb, matrix.row_ub
+    # row types and right hand sides
+    # L: -inf <= row <= ub, E: lb == row == ub, G: lb <= row (<= lb + range)
+    row_types = np.full(num_constraints, "G")
+    row_types[row_lb == row_ub] = "E"
+    row_types[row_lb == -np.inf] = "L"
+    row_types[(row_lb == -np.inf) & (row_ub == np.inf)] = "N"
+    rhs = np.where(row_types == "G", row_lb, row_ub)
+    rhs[row_types == "N"] = 0
+    integrality = matrix.integrality if mip else np.zeros(num_variables)
+
+    with open_file(filename, compress) as f:
+        writer = ChunkWriter(f, chunk_size)
+        writer.write("*<meta creator='ppulp'>\n")
+        if not with_objsense:
+            writer.write(f"*SENSE:{sense}\n")
+        writer.write("NAME          MODEL\n")
+        if maximize and with_objsense:
+            writer.write("OBJSENSE\n    MAX\n")
+
+        writer.write("ROWS\n")
+        writer.write(" N  OBJ\n")
+        for row_type, name in zip(row_types.tolist(), const_names):
+            writer.write(f" {row_type}  {name}\n")
+
+        writer.write("COLUMNS\n")
+        integer = False
+        for j, (rows, values) in enumerate(matrix_columns(matrix.A)):
+            if integrality[j] and not integer:
+                writer.write(
+                    "    MARKER                 'MARKER'                 'INTORG'\n"
+                )
+                integer = True
+            elif not integrality[j] and integer:
+                writer.write(
+                    "    MARKER                 'MARKER'                 'INTEND'\n"
+                )
+                integer = False
+            name = var_names[j]
+            if c[j] != 0:
+                writer.write(f"    {name}  OBJ  {c[j]:.12e}\n")
+            for i, value in zip(rows, values):
+                writer.write(f"    {name}  {const_names[i]}  {value:.12e}\n")
+        if integer:
+            writer.write(
+                "    MARKER                 'MARKER'                 'INTEND'\n"
+            )
+
+        writer.write("RHS\n")
+        for i in np.flatnonzero(rhs).tolist():
+            writer.write(f"    RHS  {const_names[i]}  {rhs[i]:.12e}\n")
+
+        ranges = np.flatnonzero((row_types == "G") & (row_ub != np.inf))
+        if len(ranges):
+            writer.write("RANGES\n")
+            for i in ranges.tolist():
+                writer.write(
+                    f"    RNG  {const_names[i]}  {row_ub[i] - row_lb[i]:.12e}\n"
+                )
+
+        writer.write("BOUNDS\n")
+        for j in range(num_variables):
+            name = var_names[j]
+            lb, ub = matrix.lb[j], matrix.ub[j]
+            if lb == ub:
+                writer.write(f" FX BND  {name}  {lb:.12e}\n")
+                continue
+            if lb == -np.inf and ub == np.inf:
+                writer.write(f" FR BND  {name}\n")
+                continue
+            if lb == -np.inf:
+                writer.write(f" MI BND  {name}\n")
+            elif lb != 0:
+                writer.write(f" LO BND  {name}  {lb:.12e}\n")
+            if ub != np.inf:
+                writer.write(f" UP BND  {name}  {ub:.12e}\n")
+            elif integrality[j]:
+                writer.write(f" PL BND  {name}\n")
+        writer.write("ENDATA\n")
+        writer.flush()
@@ -9,12 +9,13 @@ with codecs.open(os.path.join(here, "README.md"), encoding="utf-8") as f:
 
 setup(
     name="ppulp",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks*"]),
     include_package_data=True,
     version="0.1.0",
     license="MIT",
     install_requires=[
         "numpy",
+        "scipy",
         "pulp",
         "flopt>=0.5.5",
     ],
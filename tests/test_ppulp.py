@@ -44,6 +44,199 @@ def test_Or():
     assert x.value() == 0 or y.value() == 0
 
 
+def test_presolve():
+    x = LpVariable.array("x", 4, cat="Binary")
+    y = LpVariable("y", lowBound=0, upBound=10)
+    z = LpVariable("z", lowBound=0, upBound=10)
+
+    prob = LpProblem(sense=LpMaximize, presolve=True)
+    prob += lpSum(x) + y + z
+    prob += x[0] == 1  # singleton, fixes x[0]
+    prob += lpSum(x) == 1  # fixes the others to 0
+    prob += y + z <= 8
+    prob += y + z <= 6  # duplicate, tighter
+    prob += y - z <= 20  # redundant
+    prob.solve()
+    assert prob.getObjectiveValue() == 7
+    assert [var.value() for var in x] == [1, 0, 0, 0]
+    assert prob.presolve_stats["fixed_variables"] == 4
+    assert len(prob.pulp_lp.constraints) == 1
+
+    prob += x[1] + y >= 20  # violated by the fixed x[1] and the bound of y
+    prob.solve()
+    assert LpStatus[prob.status] == "Infeasible"
+
+    # objective of only fixed variables
+    w = LpVariable("w", lowBound=1, upBound=1, cat="Integer")
+    prob = LpProblem(sense=LpMaximize, presolve=True)
+    prob += 2 * w
+    prob += w + y <= 4
+    prob.solve()
+    assert LpStatus[prob.status] == "Optimal"
+    assert w.value() == 1
+    assert prob.getObjectiveValue() == 2
+
+
+def test_nary_logic():
+    x = LpVariable.array("x", 5, cat="Binary")
+    for values in [[1, 1, 1, 1, 1], [1, 0, 1, 1, 0], [0, 0, 0, 0, 0]]:
+        z_and = And(x)
+        z_or = Or(x[i] for i in range(5))
+        z_xor = Xor(x[0], x[1:])
+        assert len(z_and.constraints) == 6
+        assert len(z_or.constraints) == 6
+        assert len(z_xor.constraints) == 1
+
+        prob = LpProblem(sense=LpMinimize)
+        prob += z_and + z_or + z_xor
+        for xi, v in zip(x, values):
+            prob += xi == v
+        prob.solve()
+        assert z_and.value() == min(values)
+        assert z_or.value() == max(values)
+        assert z_xor.value() == sum(values) % 2
+
+
+def test_aux_variable_cache():
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    w = LpVariable("w", lowBound=-1, upBound=1)
+    f = PiecewiseLinear(abs, xl=-1, xu=1, num=3)
+    assert And(x, y) is And(y, x)
+    assert Or(x, y) is Or([y, x])
+    assert Xor(x, y) is not And(x, y)
+    assert Abs(w) is Abs(w)
+    assert f(w) is f(w)
+
+    prob = LpProblem(sense=LpMinimize)
+    prob += Abs(w) + f(w) - And(x, y)
+    prob += And(y, x) + Abs(w) >= 1
+    prob.solve()
+    assert prob.getObjectiveValue() == -1
+    # f(w) is in LP form, Abs(w) >= ... needs a binary variable
+    assert len(prob.getVariables()) == 3 + 2 + 1 + 1
+
+    # the rows shared by problems are not modified by linearization
+    z = LpVariable("z", lowBound=0, upBound=3)
+    g = PiecewiseLinear(lambda v: v * v, 0, 9, num=10)
+    e = x * z
+    c = e <= 2
+    for value, expected in [(0, 0), (1, 4), (0, 0)]:
+        prob = LpProblem(sense=LpMaximize)
+        prob += g(e)
+        prob += x == value
+        prob += c
+        prob.solve()
+        assert prob.getObjectiveValue() == expected
+    assert str(c) == "x*z-2 <= 0"
+
+
+def test_aux_variable_does_not_keep_problem():
+    import gc
+    import weakref
+
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = And(x, y)
+
+    prob = LpProblem(sense=LpMinimize)
+    prob += z + Abs(x)
+    prob += z >= 0
+    assert z.hasAddConsts(prob)
+    prob.solve()
+
+    ref = weakref.ref(prob)
+    del prob
+    gc.collect()
+    assert ref() is None
+
+    prob = LpProblem(sense=LpMinimize)
+    assert not z.hasAddConsts(prob)
+    prob += -z
+    prob.solve()
+    assert prob.getObjectiveValue() == -1
+
+
+def test_value_bounds():
+    x = LpVariable("x", lowBound=-1, upBound=2)
+    y = LpVariable("y", lowBound=0, upBound=3)
+    a = LpVariable("a", cat="Binary")
+    b = LpVariable("b", cat="Binary")
+
+    assert valueBounds(2 * x - y + x * y) == (-8, 10)
+    assert valueBounds(x - x) == (0, 0)
+    assert valueBounds(x**2) == (0, 4)
+    assert valueBounds(3 * And(a, b) - Abs(x)) == (-2, 3)
+    assert maxValue(2 * x + y) == 7
+    assert minValue(2 * x + y) == -2
+    assert minValue(x + LpVariable("z")) == -np.inf
+
+    # the bounds of nonlinear nodes follow the bounds of variables
+    xy = x * y
+    assert maxValue(xy) == 6
+    x.upBound = 10
+    assert maxValue(xy) == 30
+    assert valueBounds(xy, cache=False) == (-3, 30)
+
+
+def test_IfThen(tmp_path):
+    import pytest
+
+    x = LpVariable("x", lowBound=-1, upBound=10)
+    y = LpVariable("y", lowBound=-5, upBound=5)
+    a = LpVariable("a", lowBound=-3, upBound=3, cat="Integer")
+
+    prob = LpProblem(sense="Maximize")
+    prob += -y
+    prob += (x <= 3) >> (y >= 0)
+    prob += (a == 0) >> (y >= 1)
+    big_m = prob.getBigM()
+    assert list(big_m.values()) == pytest.approx([4.00001, 5, 3.00001, 3.00001, 6])
+
+    # y >= -1 tightens the big-M, and x <= 2 forces y >= 0 for any a
+    prob += y >= -1
+    prob += x <= 2
+    prob.linearize()
+    assert prob.getBigM()[prob.getIndicators()[0][1].name] == 1
+    prob.solve()
+    assert y.value() == pytest.approx(0)
+
+    prob += a == 0
+    prob.solve()
+    assert y.value() == pytest.approx(1)
+
+    prob.writeLP(tmp_path / "prob.lp", indicators=True)
+    lines = (tmp_path / "prob.lp").read_text().splitlines()
+    assert sum(" = 1 -> " in line for line in lines) == 2
+
+    with pytest.raises(AssertionError):
+        IfThen(LpVariable("z") <= 0, y >= 0)
+
+    # the rows are tightened in each problem, the shared rows are not modified
+    rows = IfThen(x <= 3, y >= 0)
+    for lower, expected in [(-1, -1), (None, -5)]:
+        prob = LpProblem(sense="Maximize")
+        prob += -y
+        prob += rows
+        if lower is not None:
+            prob += y >= lower
+        prob.solve()
+        assert y.value() == pytest.approx(expected)
+
+    # the big-M values follow the bounds relaxed after a solve
+    x = LpVariable("x", lowBound=0, upBound=10)
+    y = LpVariable("y", lowBound=-5, upBound=5)
+    prob = LpProblem(sense="Maximize")
+    prob += -y
+    prob += IfThen(x <= 3, y >= 0)
+    prob.solve()
+    y.lowBound = -50
+    prob += x == 8
+    prob.solve()
+    assert y.value() == pytest.approx(-50)
+    assert prob.getBigM()[prob.getIndicators()[0][1].name] == 50
+
+
 def test_Abs():
 
     x = LpVariable("x", lowBound=-5, upBound=-1, cat="Integer")
@@ -55,6 +248,64 @@ def test_Abs():
     assert prob.getObjectiveValue() == 1
     assert x.value() == -1
 
+    # the big-M values and the bound follow the bounds of the argument
+    z = LpVariable("z", lowBound=-1, upBound=1)
+    a = Abs(z)
+    prob = LpProblem(sense=LpMaximize)
+    prob += z
+    prob += a == z
+    prob.solve()
+    assert z.value() == 1
+    z.lowBound, z.upBound = -5, 5
+    prob.solve()
+    assert z.value() == 5
+    assert a.upBound == 5
+
+    # the sign of w is unknown after relaxing the bound
+    w = LpVariable("w", lowBound=1, upBound=2)
+    prob = LpProblem(sense=LpMaximize)
+    prob += Abs(w) - w
+    prob.solve()
+    assert prob.getObjectiveValue() == 0
+    w.lowBound = -3
+    prob.solve()
+    assert prob.getObjectiveValue() == 6
+
+
+def test_Abs_usage():
+    from flopt.constants import VariableType
+
+    def num_binaries(prob):
+        return sum(var.type() == VariableType.Binary for var in prob.getVariables())
+
+    x = LpVariable("x", lowBound=-4, upBound=3)
+
+    # |x| is minimized, LP encoding
+    prob = LpProblem(sense=LpMinimize)
+    prob += Abs(x) - 0.5 * x
+    prob.solve()
+    assert prob.getObjectiveValue() == 0
+    assert num_binaries(prob) == 0
+
+    # |x| >= 2 is not convex, binary split
+    prob = LpProblem(sense=LpMinimize)
+    prob += x
+    prob += Abs(x) == 2
+    prob.solve()
+    assert x.value() == -2
+    prob += x >= -1
+    prob.solve()
+    assert x.value() == 2
+    assert num_binaries(prob) == 1
+
+    # no binary is needed when the sign of x is known
+    z = LpVariable("z", lowBound=1, upBound=5)
+    prob = LpProblem(sense=LpMaximize)
+    prob += Abs(z) + Abs(-z)
+    prob.solve()
+    assert prob.getObjectiveValue() == 10
+    assert num_binaries(prob) == 0
+
 
 def test_PiecewiseLinear():
     prob = LpProblem(sense=LpMinimize)
@@ -63,3 +314,648 @@ def test_PiecewiseLinear():
     prob += f(x)
     prob.solve()
     print(x.value())
+
+
+def test_PiecewiseLinear_breakpoints():
+    import math
+    import pytest
+
+    f = PiecewiseLinear(np.log, 1, 10, num=4)
+    g = PiecewiseLinear(math.log, 1, 10, num=4)
+    x_points, y_points = f.breakpoints()
+    assert f.breakpoints()[1] is y_points  # sampled once
+    assert np.allclose(y_points, g.breakpoints()[1])
+
+    x = LpVariable.array("x", 2, lowBound=1, upBound=10)
+    f(x[0]), f(x[1])
+    assert f.breakpoints()[1] is y_points
+    f.num = 5
+    assert len(f.breakpoints()[0]) == 5
+
+    # the variable created before keeps its breakpoints
+    y = f(x[0])
+    prob = LpProblem(sense=LpMinimize)
+    prob += y
+    prob += x[0] == 4
+    prob.solve()
+    expected = np.interp(4, *f.breakpoints())
+    assert y.value() == pytest.approx(expected)
+    f.num = 4
+    assert f(x[0]) is not y
+    prob.solve()
+    assert y.value() == pytest.approx(expected)
+
+
+def test_PiecewiseLinear_adaptive():
+    f = PiecewiseLinear(np.exp, xl=0, xu=5, abs_tol=0.1)
+    x_points, y_points = f.breakpoints()
+    assert f.error() <= 0.1
+    uniform = PiecewiseLinear(np.exp, xl=0, xu=5, num=len(x_points))
+    assert uniform.error() > f.error()
+    # more breakpoints where the curvature is larger
+    assert np.diff(x_points)[-1] < np.diff(x_points)[0]
+
+    g = PiecewiseLinear(lambda v: np.exp(v), xl=0, xu=5, rel_tol=0.01)
+    assert g.error(relative=True) <= 0.01
+
+    x = LpVariable("x", lowBound=0, upBound=5)
+    prob = LpProblem(sense=LpMinimize)
+    prob += f(x)
+    prob += x == 2.5
+    prob.solve()
+    assert abs(prob.getObjectiveValue() - np.exp(2.5)) <= 0.1
+
+
+def test_PiecewiseLinear_lp_form():
+    from flopt.constants import VariableType
+
+    def num_binaries(prob):
+        return sum(var.type() == VariableType.Binary for var in prob.getVariables())
+
+    x = LpVariable("x", lowBound=0, upBound=10)
+    w = LpVariable("w", lowBound=0, upBound=10)
+    cost = PiecewiseLinear(np.square, 0, 10, num=11)
+
+    # convex and minimized
+    prob = LpProblem(sense=LpMinimize)
+    prob += cost(x) + cost(w)
+    prob += x + w >= 7
+    prob.solve()
+    assert prob.getObjectiveValue() == 25
+    assert num_binaries(prob) == 0
+
+    # cost(x) is pushed up by the constraint, the binary form is added
+    prob += cost(x) >= 30
+    prob.solve()
+    assert abs(prob.getObjectiveValue() - (30 + 1 + 3 * 6 / 11)) < 1e-6
+    assert num_binaries(prob) == 10
+
+    # concave and maximized in the constraint
+    y = LpVariable("y", lowBound=1, upBound=10)
+    utility = PiecewiseLinear(np.log, 1, 10, num=20)
+    prob = LpProblem(sense=LpMinimize)
+    prob += y
+    prob += utility(y) >= 1.5
+    prob.solve()
+    assert num_binaries(prob) == 0
+    assert abs(utility(y).value() - 1.5) < 1e-6
+
+
+def test_PiecewiseLinear_methods(tmp_path):
+    import pytest
+    from flopt.constants import VariableType
+
+    for method in PiecewiseLinear.methods:
+        for num in (3, 7, 33):
+            x = LpVariable("x", lowBound=-3, upBound=3)
+            f = PiecewiseLinear(lambda v: -v * v, -3, 3, num=num, method=method)
+
+            # not convex, the segment including x = 1 must be selected
+            prob = LpProblem(sense=LpMinimize)
+            prob += f(x)
+            prob += x == 1
+            prob.solve()
+            x_points, y_points = f.breakpoints()
+            assert (
+                abs(prob.getObjectiveValue() - np.interp(1, x_points, y_points)) < 1e-6
+            )
+
+            num_binaries = sum(
+                var.type() == VariableType.Binary for var in prob.getVariables()
+            )
+            if method == "log":
+                assert num_binaries == int(np.ceil(np.log2(num - 1)))
+            if method == "sos2":
+                assert num_binaries == 0
+                prob.writeLP(tmp_path / "sos2.lp")
+                assert "S2::" in (tmp_path / "sos2.lp").read_text()
+                with pytest.raises(ValueError, match="sos2"):
+                    prob.to_matrix()
+
+
+def test_incremental_resolve():
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = LpVariable("z", lowBound=2, upBound=4, cat="Integer")
+
+    prob = LpProblem(sense=LpMinimize)
+    prob += x * y * z
+    prob += x + y >= 1
+    prob.solve()
+    assert prob.getObjectiveValue() == 0
+
+    pulp_lp = prob.pulp_lp
+    num_constraints = len(pulp_lp.constraints)
+
+    # add a cut, the pulp model is updated instead of rebuilt
+    prob += x + y >= 2
+    prob.solve()
+    assert prob.pulp_lp is pulp_lp
+    assert len(pulp_lp.constraints) == num_constraints + 1
+    assert prob.getObjectiveValue() == 2
+
+    # change the objective
+    prob += -z
+    prob.solve()
+    assert prob.pulp_lp is pulp_lp
+    assert z.value() == 4
+
+    # edit a bound, with and without adding a constraint
+    z.upBound = 3
+    prob.solve()
+    assert prob.pulp_lp is pulp_lp
+    assert z.value() == 3
+    # the products of x * y * z are made again with the relaxed bound
+    z.upBound = 10
+    prob += z <= 8
+    prob.solve()
+    assert z.value() == 8
+
+    # presolve reduced the model with the old bounds, so it is rebuilt
+    w = LpVariable("w", lowBound=0, upBound=10)
+    prob = LpProblem(sense=LpMaximize, presolve=True)
+    prob += w
+    prob += w <= 15
+    prob.solve()
+    assert w.value() == 10
+    w.upBound = 20
+    prob.solve()
+    assert w.value() == 15
+
+
+def test_resolve_objective_change():
+    for sense in [LpMinimize, LpMaximize]:
+        for warm_start in [None, False]:
+            x = LpVariable("x", lowBound=-4, upBound=4)
+            y = LpVariable("y", lowBound=-4, upBound=4)
+            prob = LpProblem(sense=sense)
+            prob.setObjective(x + y)
+            prob.solve(warmStart=warm_start)
+            # y is left in no row and not in the objective
+            prob.setObjective(x)
+            prob.solve(warmStart=warm_start)
+            assert LpStatus[prob.status] == "Optimal"
+            assert x.value() == (4 if sense == LpMaximize else -4)
+
+    # the objective is set after solving without objective
+    prob = LpProblem(sense=LpMaximize)
+    prob.solve()
+    prob.setObjective(-x)
+    prob.solve()
+    assert x.value() == -4
+
+
+def test_linearize_memoized():
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += x * y
+    prob += x + y <= 1
+    prob.linearize()
+    num_constraints = len(prob.constraints)
+    num_variables = len(prob.getVariables())
+
+    # linearize again does not create new product variables
+    prob.linearize()
+    assert len(prob.constraints) == num_constraints
+
+    # x * y in a new constraint reuses the product variable
+    prob += x * y <= 0
+    prob.linearize()
+    assert len(prob.constraints) == num_constraints + 1
+    assert len(prob.getVariables()) == num_variables
+
+    prob.solve()
+    assert prob.getObjectiveValue() == 0
+
+    # the forms of the replaced objectives are dropped
+    num_linearized = len(prob._linearizer.linearized)
+    for k in range(1, 10):
+        prob.setObjective(k * x * y + x)
+        prob.solve()
+    assert len(prob._linearizer.linearized) <= num_linearized + 2
+
+
+def test_linearize_shared_monomials():
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = LpVariable("z", lowBound=-2, upBound=5)
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += x * y * z + z * x * y + 2 * y * x * z - z
+    prob += y * z * x <= 3
+    prob += z <= 2 * x + 1
+    prob.linearize()
+
+    # x*y and (x*y)*z are shared by all orders of factors
+    assert len(prob._linearizer.var_muls) == 2
+    var_mul = prob._linearizer.product([x, y, z])
+    # the upper bound 5 of z is tightened to 3 by z <= 2 * x + 1
+    assert (var_mul.getLb(), var_mul.getUb()) == (-2, 3)
+
+    prob.solve()
+    assert prob.getObjectiveValue() == 9
+    assert z.value() == 3
+
+
+def test_to_matrix():
+    from scipy.optimize import milp, LinearConstraint, Bounds
+
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = LpVariable("z", lowBound=0, upBound=3, cat="Integer")
+    w = LpVariable("w", lowBound=-1, upBound=2)
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += x * y + 2 * z - w + 1
+    prob += x + y + z <= 3, "c1"
+    prob += z - w == 1, "c2"
+
+    m = prob.to_matrix()
+    assert m.A.shape == (m.numConstraints(), m.numVariables())
+    assert set(m.var_names) == {var.name for var in prob.getVariables()}
+    assert m.row_ub[m.const_index["c1"]] == 3
+    assert m.row_lb[m.const_index["c2"]] == m.row_ub[m.const_index["c2"]] == 1
+
+    res = milp(
+        -m.c,
+        constraints=LinearConstraint(m.A, m.row_lb, m.row_ub),
+        bounds=Bounds(m.lb, m.ub),
+        integrality=m.integrality,
+    )
+    prob.solve()
+    assert abs((-res.fun + m.C) - prob.getObjectiveValue()) < 1e-6
+
+
+def test_solution_array():
+    x = LpVariable.array("x", 5, lowBound=0, upBound=10, cat="Integer")
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += lpSum(x)
+    prob += x[0] + x[1] <= 3
+
+    assert prob.solution_array() is None
+    prob.solve()
+
+    values = prob.solution_array()
+    assert len(values) == len(prob.pulp_vars) == 5
+    assert values.sum() == prob.getObjectiveValue() == 33
+    assert list(prob.solution_array(x[2:])) == [10, 10, 10]
+    assert all(var.value() == value for var, value in zip(x, prob.solution_array(x)))
+
+
+def test_write(tmp_path):
+    import gzip
+    import pulp
+
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = LpVariable("z", lowBound=2, upBound=4, cat="Integer")
+    w = LpVariable("w", lowBound=-1, upBound=2)
+
+    prob = LpProblem("write prob", sense=LpMaximize)
+    prob += x * y * z + 2 * z - w
+    prob += x + y + z <= 3, "c1"
+    prob += z - w == 1, "c2"
+
+    prob.writeLP(tmp_path / "prob.lp")
+    prob.writeMPS(tmp_path / "prob.mps")
+    prob.writeMPS(tmp_path / "prob.mps.gz", with_objsense=True)
+    prob.solve()
+
+    with open(tmp_path / "prob.lp") as f:
+        lp = f.read()
+    assert "c1: x + y + z <= 3" in lp
+    assert "c2: z - w = 1" in lp
+
+    # the objective is written as it is with the sense line of pulp
+    with open(tmp_path / "prob.mps") as f:
+        assert "*SENSE:Maximize\n" in f.read()
+    _, mps_prob = pulp.LpProblem.fromMPS(tmp_path / "prob.mps", pulp.LpMaximize)
+    mps_prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    assert pulp.value(mps_prob.objective) == prob.getObjectiveValue()
+    read_prob = LpProblem.fromMPS(tmp_path / "prob.mps")
+    assert read_prob.sense == "Maximize"
+    read_prob.solve()
+    assert read_prob.getObjectiveValue() == prob.getObjectiveValue()
+
+    with gzip.open(tmp_path / "prob.mps.gz", "rt") as f:
+        assert "OBJSENSE\n    MAX\n" in f.read()
+
+    # positional parameters of pulp
+    prob.writeMPS(tmp_path / "min.mps", pulp.LpMinimize, 0, 1, True)
+    _, mps_prob = pulp.LpProblem.fromMPS(tmp_path / "min.mps")
+    mps_prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    assert -pulp.value(mps_prob.objective) == prob.getObjectiveValue()
+
+    # rows whose coefficients are all zero
+    prob = LpProblem(sense=LpMinimize)
+    prob += x
+    prob += x - x <= -1, "c1"
+    prob += y - y <= 1, "c2"
+    prob.writeLP(tmp_path / "zero.lp", True, True, 100)
+    with open(tmp_path / "zero.lp") as f:
+        lp = f.read()
+    assert "c1: 0 x <= -1" in lp
+    assert "c2: 0 y <= 1" in lp
+    read_prob = LpProblem.fromLP(tmp_path / "zero.lp")
+    read_prob.solve()
+    assert LpStatus[read_prob.status] == "Infeasible"
+
+
+def test_read(tmp_path):
+    x = LpVariable("x", cat="Binary")
+    y = LpVariable("y", cat="Binary")
+    z = LpVariable("z", lowBound=2, upBound=4, cat="Integer")
+    w = LpVariable("w", lowBound=-1, upBound=2)
+
+    prob = LpProblem("read prob", sense=LpMaximize)
+    prob += x * y * z + 2 * z - w
+    prob += x + y + z <= 3, "c1"
+    prob += z - w == 1, "c2"
+    prob.solve()
+
+    prob.writeLP(tmp_path / "prob.lp")
+    prob.writeMPS(tmp_path / "prob.mps.gz", with_objsense=True)
+    for read_prob in [
+        LpProblem.fromLP(tmp_path / "prob.lp"),
+        LpProblem.fromMPS(tmp_path / "prob.mps.gz"),
+    ]:
+        m = read_prob.lp_matrix
+        assert m.numConstraints() == len(prob.constraints)
+        row = m.A[m.const_index["c2"]].toarray()[0]
+        assert row[m.var_index["z"]] == 1 and row[m.var_index["w"]] == -1
+        assert read_prob.sense == "Maximize"
+        read_prob.solve()
+        assert read_prob.getObjectiveValue() == prob.getObjectiveValue()
+
+        # add constraint to the rows of the matrix
+        (w_,) = [var for var in read_prob.lp_matrix.x if var.name == "w"]
+        read_prob += w_ <= 1, "c3"
+        read_prob.solve()
+        assert read_prob.getObjectiveValue() == prob.getObjectiveValue() - 1
+        assert read_prob.to_matrix().numConstraints() == m.numConstraints() + 1
+
+
+def test_read_pulp_mps(tmp_path):
+    import pulp
+
+    x = pulp.LpVariable("x", lowBound=0, upBound=4)
+    y = pulp.LpVariable("y", lowBound=0, upBound=3, cat="Integer")
+    pulp_prob = pulp.LpProblem("pulp_prob", pulp.LpMaximize)
+    pulp_prob += 2 * x + 3 * y
+    pulp_prob += x + y <= 5, "c1"
+    pulp_prob.writeMPS(tmp_path / "prob.mps")
+    pulp_prob.solve(pulp.PULP_CBC_CMD(msg=False))
+
+    prob = LpProblem.fromMPS(tmp_path / "prob.mps")
+    assert prob.sense == "Maximize"
+    prob.solve()
+    assert prob.getObjectiveValue() == pulp.value(pulp_prob.objective) == 13
+
+
+def test_read_mps_ranges(tmp_path):
+    with open(tmp_path / "ranges.mps", "w") as f:
+        f.write(
+            "NAME RANGES\n"
+            "ROWS\n N obj\n L r1\n G r2\n E r3\n"
+            "COLUMNS\n x obj -1 r1 1\n x r2 1 r3 1\n"
+            "RHS\n RHS r1 4 r2 1\n RHS r3 2\n"
+            "RANGES\n RNG r1 2 r2 2\n RNG r3 -1\n"
+            "BOUNDS\n UP BND x 10\n"
+            "ENDATA\n"
+        )
+    prob = LpProblem.fromMPS(tmp_path / "ranges.mps")
+    m = prob.lp_matrix
+    assert list(m.row_lb) == [2, 1, 1] and list(m.row_ub) == [4, 3, 2]
+    prob.solve()
+    assert prob.getObjectiveValue() == -2
+
+
+def test_read_lp_unsupported(tmp_path):
+    import pytest
+
+    head = "Minimize\n obj: x + y\nSubject To\n"
+    cases = {
+        "SOS": head + " c1: x + y >= 1\nSOS\n s1: S2:: x:1 y:2\nEnd\n",
+        "indicator": head + " c1: b = 1 -> x + y >= 1\nBinaries\n b\nEnd\n",
+        "comparison": head + " c1: x + y 1\nEnd\n",
+    }
+    for case, text in cases.items():
+        (tmp_path / "prob.lp").write_text(text)
+        with pytest.raises(ValueError, match=case):
+            LpProblem.fromLP(tmp_path / "prob.lp")
+
+
+def test_solve_many():
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += 3 * x + 2 * y
+    prob += x + y <= 4, "c1"
+
+    variants = [
+        {},
+        {"objective": {x: 1}},
+        {"upBound": {"y": 1}},
+        {"constraints": {"c1": x + 2 * y <= 6}},
+        {"constraints": {"c1": x + y >= 5}, "upBound": {x: 1, y: 1}},
+    ]
+    statuses, solutions = prob.solve_many(variants, workers=2, variables=[x, y])
+    assert statuses == [1, 1, 1, 1, -1]
+    assert solutions[:4].tolist() == [[4, 0], [0, 4], [4, 0], [6, 0]]
+
+    # base problem is not changed
+    prob.solve()
+    assert prob.getObjectiveValue() == 12
+
+
+def test_solve_async():
+    import asyncio
+
+    import pytest
+
+    def knapsack():
+        x = LpVariable.array("x", 5, cat="Binary")
+        prob = LpProblem(sense=LpMaximize)
+        prob += lpSum([(i + 1) * x[i] for i in range(5)])
+        prob += lpSum(x) <= 2, "cap"
+        return prob, x
+
+    async def main():
+        probs = [knapsack() for _ in range(10)]
+        statuses = await asyncio.gather(
+            *[prob.solve_async(msg=False) for prob, _ in probs]
+        )
+        assert statuses == [1] * 10
+        for prob, x in probs:
+            assert prob.getObjectiveValue() == 9
+            assert list(prob.solution_array(x)) == [0, 0, 0, 1, 1]
+
+        prob, _ = knapsack()
+        with pytest.raises(asyncio.TimeoutError):
+            await prob.solve_async(msg=False, timeout=0)
+
+        # special ordered sets are solved by solve() only
+        w = LpVariable("w", lowBound=0, upBound=4)
+        f = PiecewiseLinear(lambda v: v * v, xl=0, xu=4, num=5, method="sos2")
+        prob = LpProblem(sense=LpMaximize)
+        prob += w - f(w)
+        with pytest.raises(ValueError, match="sos2"):
+            await prob.solve_async(msg=False)
+        with pytest.raises(ValueError, match="sos2"):
+            prob.solve_many([{}])
+        prob.solve()
+        assert prob.getObjectiveValue() == 0
+
+    asyncio.run(main())
+
+
+def test_stats(tmp_path):
+    x = LpVariable("x", lowBound=0, upBound=3)
+    y = LpVariable("y", cat="Binary")
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += x + y
+    prob += x * y <= 2
+    prob.solve()
+    assert prob.stats.phases == {}
+
+    spans = []
+    prob = LpProblem(sense=LpMaximize, stats=True)
+    prob.stats.addCallback(spans.append)
+    prob += x + y
+    prob += x * y <= 2
+    prob.solve()
+    prob.writeLP(tmp_path / "prob.lp")
+    prob.writeMPS(tmp_path / "prob.mps")
+
+    stats = prob.stats.toDict()
+    for name in ["traverse", "linearize", "flopt_to_pulp", "write", "solver"]:
+        assert stats[name]["calls"] > 0
+    assert stats["traverse"]["count"] == 2
+    assert stats["decode"]["count"] == 3  # x, y and the product
+    assert stats["solve"]["calls"] == stats["writeLP"]["calls"] == 1
+    assert stats["write"]["calls"] == 3
+    assert len(spans) == sum(phase["calls"] for phase in stats.values())
+    assert all(span.time >= 0 for span in spans)
+
+
+def test_size_report():
+    x = LpVariable("x", lowBound=-4, upBound=3)
+    y = LpVariable.array("y", 2, cat="Binary")
+    w = LpVariable("w", lowBound=0, upBound=2)
+    f = PiecewiseLinear(np.exp, 0, 2, num=5, method="binary")
+
+    prob = LpProblem()
+    prob += Abs(x) + f(w) - And(y) + x * y[0]
+    prob += x + w >= 1
+    prob += (x <= 0) >> (w >= 1)
+    report = prob.sizeReport()
+
+    assert list(report)[0] == "user"
+    assert report["user"]["variables"] == 4  # x, y[0], y[1], w
+    assert report["user"]["constraints"] == 1
+    assert report["And"] == {**report["And"], "variables": 1, "constraints": 3}
+    assert report["linearization"]["constraints"] == 4
+    assert report["IfThen"]["constraints"] == 2
+    # y_PL, t (5) and z (4)
+    assert report["PiecewiseLinear"]["variables"] == 10
+    assert sum(size["variables"] for size in report.values()) == len(
+        prob.getVariables()
+    )
+    assert sum(size["constraints"] for size in report.values()) == len(prob.constraints)
+    assert all(size["memory"] > 0 for size in report.values())
+    assert "total" in prob.showSizeReport(to_str=True)
+
+
+def test_warm_start(tmp_path, monkeypatch, caplog):
+    import logging
+
+    x = LpVariable.array("x", 4, cat="Binary")
+    z = LpVariable("z", lowBound=-5, upBound=5, cat="Integer", ini_value=-3)
+    w = LpVariable("w", lowBound=0, upBound=10, ini_value=2.5)
+    f = PiecewiseLinear(lambda v: v**2, xl=0, xu=10, num=5)
+
+    prob = LpProblem(sense=LpMaximize)
+    prob += And(x[0], x[1]) + Or(x[2], x[3]) + Xor(x[0], x[3]) + x[0] * z - Abs(z)
+    prob += lpSum(x) <= 2
+    prob += f(w) <= 50
+    prob.linearize()
+
+    # auxiliary variables are completed from the current values
+    for var, value in zip(x, [1, 1, 0, 0]):
+        var.setValue(value)
+    prob.completeValues()
+    assert all(
+        abs(const.value()) < 1e-9 or const.feasible() for const in prob.getConstraints()
+    )
+
+    # the values are written in the MIP start file passed to CBC
+    monkeypatch.chdir(tmp_path)
+    with caplog.at_level(logging.DEBUG, logger="pulp.apis.core"):
+        prob.solve(warmStart=True, keepFiles=True)
+    assert " -mips NoName-pulp.mst " in caplog.text
+    with open(tmp_path / "NoName-pulp.mst") as f:
+        lines = f.read().splitlines()[1:]
+    names = [var.name for var in prob.pulp_lp.variables()]
+    assert len(lines) == len(names)
+    initial = {names[int(line.split()[0])]: float(line.split()[2]) for line in lines}
+    assert [initial[var.name] for var in x] == [1, 1, 0, 0]
+    assert initial["z"] == -3 and initial["w"] == 2.5
+    assert prob.getObjectiveValue() == 2
+
+    caplog.clear()
+    with caplog.at_level(logging.DEBUG, logger="pulp.apis.core"):
+        prob.solve()  # warm start from the last solution
+    assert " -mips " in caplog.text
+    assert prob.getObjectiveValue() == 2
+
+
+def test_parameter():
+    x = LpVariable("x", lowBound=0)
+    y = LpVariable("y", lowBound=0)
+    demand = LpParameter("demand", 10)
+    price = LpParameter("price", 3)
+
+    prob = LpProblem(sense="Minimize")
+    prob += price * x + y
+    prob += x + y >= demand, "demand"
+    prob += x <= 100, "cap"
+    prob.solve()
+    assert prob.getObjectiveValue() == 10
+    assert y.value() == 10
+
+    demand.set(20)
+    price.set(0.5)
+    prob.solve()
+    assert prob.getObjectiveValue() == 10
+    assert x.value() == 20
+
+    matrix = prob.to_matrix()
+    assert sorted(matrix.row_ub.tolist()) == [-20, 100]
+
+
+def test_benchmarks(tmp_path):
+    import json
+
+    from benchmarks import compare, run
+
+    # one tiny size of each problem, without tracing the memory
+    output = tmp_path / "results.json"
+    run.main(["--rows", "20", "--no-memory", "--output", str(output)])
+    data = json.loads(output.read_text())
+    assert len(data["results"]) == len(run.GENERATORS)
+    for result in data["results"]:
+        assert result["status"] == "Optimal"
+        assert set(result["phases"]) >= {
+            "build",
+            "linearize",
+            "flopt_to_pulp",
+            "writeLP",
+            "solve",
+            "solve.solver",
+        }
+    assert compare.main([str(output), str(output)]) == 0